@@ -0,0 +1,303 @@
+"""Pack and read the offline bootstrap bundles."""
+
+import hashlib
+import io
+import json
+import mmap
+import secrets
+import shutil
+import subprocess
+import sys
+import sysconfig
+import zipfile
+from dataclasses import dataclass, field
+from functools import cache, partial
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import time
+
+import click
+
+from bootstrap.constants import (
+    BACKEND_TEMPLATE_URLS,
+    BUNDLE_MANIFEST_NAME,
+    BUNDLE_VERSION,
+    BUNDLES_CACHE_DIR,
+    FRONTEND_TEMPLATE_URLS,
+    PROCESS_STREAM_CHUNK_SIZE,
+    TOFU_MODULES_DIR,
+)
+from bootstrap.exceptions import BootstrapError
+from bootstrap.helpers import get_git_mirror_dir, get_tofu_version, split_template_url
+
+error = partial(click.style, fg="red")
+
+highlight = partial(click.style, fg="cyan")
+
+info = partial(click.style, dim=True)
+
+warning = partial(click.style, fg="yellow")
+
+
+def hash_file(path):
+    """Return the SHA-256 hash of the given file."""
+    with path.open("rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def write_bundle(build_dir, bundle_path, templates, **metadata):
+    """Write the files of the given directory to a bundle, along with a manifest.
+
+    Files are stored uncompressed, so that they can be read straight from the
+    memory mapped bundle.
+    """
+    files = {
+        path.relative_to(build_dir).as_posix(): hash_file(path)
+        for path in sorted(build_dir.rglob("*"))
+        if path.is_file()
+    }
+    manifest = {
+        "version": BUNDLE_VERSION,
+        "created": round(time()),
+        **metadata,
+        "templates": templates,
+        "files": files,
+    }
+    tmp_path = bundle_path.with_name(f"{bundle_path.name}.{secrets.token_hex(4)}")
+    try:
+        with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_STORED) as archive:
+            archive.writestr(
+                BUNDLE_MANIFEST_NAME, json.dumps(manifest, indent=2, sort_keys=True)
+            )
+            for name in files:
+                archive.write(build_dir / name, name)
+        tmp_path.replace(bundle_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+class MappedFile(io.RawIOBase):
+    """A read only file over a memory map."""
+
+    def __init__(self, data):
+        """Wrap the given memory map."""
+        self.data = data
+
+    def readable(self):
+        """Tell the file is readable."""
+        return True
+
+    def seekable(self):
+        """Tell the file is seekable."""
+        return True
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        """Move to the given position, return the new one."""
+        self.data.seek(offset, whence)
+        return self.data.tell()
+
+    def tell(self):
+        """Return the current position."""
+        return self.data.tell()
+
+    def read(self, size=-1):
+        """Read up to the given number of bytes, straight from the memory map."""
+        return self.data.read(size)
+
+    def readinto(self, buffer):
+        """Read into the given buffer, return the number of bytes read."""
+        chunk = self.data.read(len(buffer))
+        buffer[: len(chunk)] = chunk
+        return len(chunk)
+
+
+@dataclass(kw_only=True)
+class Bundle:
+    """An offline bootstrap bundle, read through a memory map."""
+
+    path: Path
+    archive: zipfile.ZipFile = field(init=False)
+    manifest: dict = field(init=False)
+    bundle_id: str = field(init=False)
+
+    def __post_init__(self):
+        """Map the bundle and read its manifest."""
+        try:
+            with self.path.open("rb") as bundle_file:
+                # NOTE: the memory map stays valid after the file is closed
+                data = mmap.mmap(bundle_file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.archive = zipfile.ZipFile(MappedFile(data))
+            manifest = self.archive.read(BUNDLE_MANIFEST_NAME)
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile) as e:
+            click.echo(error(f"Invalid bundle {self.path} ({e})"))
+            raise BootstrapError from e
+        self.manifest = json.loads(manifest)
+        if self.manifest.get("version") != BUNDLE_VERSION:
+            click.echo(
+                error(
+                    f"Unsupported bundle {self.path} version "
+                    f"{self.manifest.get('version')} (expected {BUNDLE_VERSION})"
+                )
+            )
+            raise BootstrapError
+        self.bundle_id = hashlib.sha256(manifest).hexdigest()[:16]
+        self.manifest.get("python") != sys.implementation.cache_tag and click.echo(
+            warning(
+                f"The bundle {self.path} was created for {self.manifest.get('python')}"
+                f", its dependencies may not install on {sys.implementation.cache_tag}."
+            )
+        )
+
+    def extract(self, name):
+        """Extract the given file or directory once, return its local path.
+
+        The files are checked against the manifest hashes while being extracted.
+        """
+        target_path = BUNDLES_CACHE_DIR / self.bundle_id / name
+        if target_path.exists():
+            return target_path
+        file_names = [
+            file_name
+            for file_name in self.manifest["files"]
+            if file_name == name or file_name.startswith(f"{name}/")
+        ]
+        if not file_names:
+            click.echo(error(f"'{name}' not found in the bundle {self.path}"))
+            raise BootstrapError
+        # NOTE: extracted aside and renamed, since runs can share the cache
+        tmp_dir = BUNDLES_CACHE_DIR / self.bundle_id / f".{secrets.token_hex(4)}"
+        try:
+            for file_name in file_names:
+                self.extract_file(file_name, tmp_dir / file_name)
+            target_path.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                (tmp_dir / name).rename(target_path)
+            except OSError:
+                pass
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        return target_path
+
+    def extract_file(self, file_name, path):
+        """Extract the given file to the given path, checking its hash."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        file_hash = hashlib.sha256()
+        with self.archive.open(file_name) as source, path.open("wb") as target:
+            while chunk := source.read(PROCESS_STREAM_CHUNK_SIZE):
+                file_hash.update(chunk)
+                target.write(chunk)
+        if file_hash.hexdigest() != self.manifest["files"][file_name]:
+            click.echo(error(f"Corrupted '{file_name}' in the bundle {self.path}"))
+            raise BootstrapError
+
+    def extract_template(self, url):
+        """Extract the git bundle of the given template repository, return its path."""
+        if not (template := self.manifest["templates"].get(url)):
+            click.echo(error(f"The {url} template is not in the bundle {self.path}"))
+            raise BootstrapError
+        return self.extract(template["path"])
+
+
+@cache
+def open_bundle(bundle_path):
+    """Return the bundle at the given path, opened once."""
+    return Bundle(path=Path(bundle_path))
+
+
+def run_command(args):
+    """Run the given command, return its output or fail showing its errors."""
+    result = subprocess.run(list(map(str, args)), capture_output=True, text=True)
+    if result.returncode != 0:
+        click.echo(error(f"'{' '.join(map(str, args))}' failed"))
+        click.echo(result.stderr)
+        raise BootstrapError
+    return result.stdout
+
+
+def create_bundle(bundle_path, platforms=()):
+    """Create a bundle of the providers, templates and dependencies."""
+    with TemporaryDirectory() as temp_dir:
+        build_dir, mirrors_dir = Path(temp_dir) / "build", Path(temp_dir) / "mirrors"
+        click.echo(info("...mirroring the OpenTofu providers"))
+        for module_dir in sorted(TOFU_MODULES_DIR.iterdir()):
+            run_command(
+                [
+                    "tofu",
+                    f"-chdir={module_dir}",
+                    "providers",
+                    "mirror",
+                    *(f"-platform={platform}" for platform in platforms),
+                    build_dir / "providers",
+                ]
+            )
+        templates = {}
+        for template_url in sorted(
+            {*BACKEND_TEMPLATE_URLS.values(), *FRONTEND_TEMPLATE_URLS.values()}
+        ):
+            url, ref = split_template_url(template_url)
+            click.echo(info(f"...bundling the {url} template and dependencies"))
+            mirror_dir = mirrors_dir / get_git_mirror_dir(url).name
+            run_command(["git", "clone", "-q", "--mirror", url, mirror_dir])
+            templates[url] = {"path": f"templates/{mirror_dir.stem}.bundle"}
+            (build_dir / "templates").mkdir(parents=True, exist_ok=True)
+            run_command(
+                [
+                    "git",
+                    "-C",
+                    mirror_dir,
+                    "bundle",
+                    "create",
+                    "-q",
+                    build_dir / templates[url]["path"],
+                    "--all",
+                ]
+            )
+            requirements_path = mirror_dir.with_suffix(".txt")
+            requirements_path.write_text(
+                run_command(
+                    [
+                        "git",
+                        "-C",
+                        mirror_dir,
+                        "show",
+                        f"{ref or 'HEAD'}:requirements/common.txt",
+                    ]
+                )
+            )
+            run_command(
+                [
+                    sys.executable,
+                    "-m",
+                    "pip",
+                    "download",
+                    "-q",
+                    "-d",
+                    build_dir / "wheels",
+                    "-r",
+                    requirements_path,
+                ]
+            )
+        write_bundle(
+            build_dir,
+            bundle_path,
+            templates,
+            opentofu_version=get_tofu_version(),
+            platform=sysconfig.get_platform(),
+            python=sys.implementation.cache_tag,
+        )
+
+
+@click.command()
+@click.argument("bundle_path", type=click.Path(dir_okay=False, path_type=Path))
+@click.option("--platform", "platforms", multiple=True)
+def main(bundle_path, platforms):
+    """Create an offline bootstrap bundle."""
+    try:
+        create_bundle(bundle_path, platforms)
+    except BootstrapError as e:
+        raise click.Abort() from e
+    click.echo(highlight(f"Bundle written to {bundle_path}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,7 @@ from bootstrap.constants import (
     AWS_S3_REGION_DEFAULT,
     BACKEND_TYPE_CHOICES,
     BACKEND_TYPE_DEFAULT,
+    BOOTSTRAP_MAX_WORKERS_DEFAULT,
     CLUSTERS_DEFAULT,
     CORE_PROVIDER_AWS,
     CORE_PROVIDER_CHOICES,
@@ -25,11 +26,14 @@ from bootstrap.constants import (
     FRONTEND_TYPE_CHOICES,
     FRONTEND_TYPE_DEFAULT,
     GITLAB_URL_DEFAULT,
+    LOG_COMPRESSION_NONE,
     MEDIA_STORAGE_AWS_S3,
     MEDIA_STORAGE_CHOICES,
     MEDIA_STORAGE_DIGITALOCEAN_S3,
     TERRAFORM_BACKEND_CHOICES,
     TERRAFORM_BACKEND_TFC,
+    TOFU_APPLY_RETRIES_DEFAULT,
+    TOFU_LOG_LEVEL_DEFAULT,
 )
 from bootstrap.helpers import (
     validate_or_prompt_domain,
@@ -118,6 +122,18 @@ class Collector:
     gid: int | None = None
     terraform_dir: Path | None = None
     logs_dir: Path | None = None
+    max_workers: int = BOOTSTRAP_MAX_WORKERS_DEFAULT
+    live_output: bool = False
+    tofu_log_level: str = TOFU_LOG_LEVEL_DEFAULT
+    tofu_log_compression: str = LOG_COMPRESSION_NONE
+    logs_retention: int | None = None
+    tofu_apply_retries: int = TOFU_APPLY_RETRIES_DEFAULT
+    tofu_drift_check: bool = False
+    process_timeout: int | None = None
+    plan_only: bool = False
+    resume_run_id: str | None = None
+    bundle: Path | None = None
+    trace_otlp: bool = False
     quiet: bool = False
 
     def __post_init__(self):
@@ -165,12 +181,17 @@ class Collector:
     def set_service_dir(self):
         """Set the service dir option."""
         service_dir = self.output_dir / self.project_dirname
-        if service_dir.is_dir() and click.confirm(
-            warning(
-                f'A directory "{service_dir.resolve()}" already exists and '
-                "must be deleted. Continue?",
-            ),
-            abort=True,
+        # NOTE: a resumed run continues in its service directory
+        if (
+            not self.resume_run_id
+            and service_dir.is_dir()
+            and click.confirm(
+                warning(
+                    f'A directory "{service_dir.resolve()}" already exists and '
+                    "must be deleted. Continue?",
+                ),
+                abort=True,
+            )
         ):
             rmtree(service_dir)
         self._service_dir = service_dir
@@ -638,6 +659,18 @@ class Collector:
             gitlab_group_developers=self.gitlab_group_developers,
             terraform_dir=self.terraform_dir,
             logs_dir=self.logs_dir,
+            max_workers=self.max_workers,
+            live_output=self.live_output,
+            tofu_log_level=self.tofu_log_level,
+            tofu_log_compression=self.tofu_log_compression,
+            logs_retention=self.logs_retention,
+            tofu_apply_retries=self.tofu_apply_retries,
+            tofu_drift_check=self.tofu_drift_check,
+            process_timeout=self.process_timeout,
+            plan_only=self.plan_only,
+            resume_run_id=self.resume_run_id,
+            bundle=self.bundle,
+            trace_otlp=self.trace_otlp,
         )
 
     def launch_runner(self):
@@ -5,6 +5,7 @@ from pathlib import Path
 
 BASE_DIR = Path(__file__).parent.parent
 DUMPS_DIR = BASE_DIR / ".dumps"
+TRASH_DIR = BASE_DIR / ".trash"
 
 # Environments
 
@@ -52,6 +53,23 @@ FRONTEND_TEMPLATE_URLS = {
 
 SUBREPOS_DIR = Path(__file__).parent.parent / ".subrepos"
 
+SUBREPO_WORKER_PATH = Path(__file__).parent / "worker.py"
+
+# NOTE: template URLs can be pinned to a revision (e.g. 'https://...#v1.0.0')
+TEMPLATE_URL_REF_SEPARATOR = "#"
+
+GIT_MIRRORS_DIR = Path(os.environ.get("GIT_MIRRORS_DIR", BASE_DIR / ".git-mirrors"))
+
+GIT_MIRROR_MAX_AGE = int(os.environ.get("GIT_MIRROR_MAX_AGE", 3600))
+
+GIT_COMMIT_SHA_PATTERN = r"[0-9a-f]{40}|[0-9a-f]{64}"
+
+SUBREPOS_VENVS_DIR = Path(
+    os.environ.get("SUBREPOS_VENVS_DIR", BASE_DIR / ".subrepos-venvs")
+)
+
+UV_CACHE_DIR = Path(os.environ.get("UV_CACHE_DIR", BASE_DIR / ".uv-cache"))
+
 # Services type
 
 SERVICE_SLUG_DEFAULT = "platform"
@@ -101,6 +119,14 @@ TERRAFORM_BACKEND_TFC = "terraform-cloud"
 
 TERRAFORM_BACKEND_CHOICES = [TERRAFORM_BACKEND_TFC, TERRAFORM_BACKEND_GITLAB]
 
+# Terraform Cloud
+
+TFC_PROJECT_TARGETS = ["tfe_project.main", "tfe_project_settings.main"]
+
+TFC_PROJECT_READY_INTERVAL = 2
+
+TFC_PROJECT_READY_TIMEOUT = 60
+
 # GitLab
 
 GITLAB_URL_DEFAULT = "https://gitlab.com"
@@ -147,13 +173,137 @@ OPENTOFU_COMPONENT_VERSION = "3.11.0"
 
 OPENTOFU_VERSION = "1.10.6"
 
+TOFU_LOG_LEVEL_OFF = "OFF"
+
+TOFU_LOG_LEVEL_DEFAULT = "INFO"
+
+TOFU_LOG_LEVEL_CHOICES = ["TRACE", "DEBUG", "INFO", "WARN", "ERROR", TOFU_LOG_LEVEL_OFF]
+
+TOFU_APPLY_RETRIES_DEFAULT = 2
+
+TOFU_RETRY_BACKOFF_BASE = 5
+
+TOFU_RETRY_BACKOFF_MAX = 120
+
+TOFU_TFVARS_FILENAME = "terraform.tfvars.json"
+
+TOFU_LOCK_FILENAME = ".terraform.lock.hcl"
+
+TOFU_SECRETS_FILENAME = "secrets.json"
+
+TOFU_PLAN_PLACEHOLDER = "(known after apply)"
+
+TOFU_STATES_DIR = BASE_DIR / ".tofu" / "states"
+
+TOFU_INIT_CACHE_DIR = BASE_DIR / ".tofu" / "init-cache"
+
+TOFU_PLUGIN_CACHE_DIR = Path(
+    os.environ.get("TF_PLUGIN_CACHE_DIR", BASE_DIR / ".tofu" / "plugin-cache")
+)
+
+TOFU_PROVIDERS_MIRROR_DIR = Path(
+    os.environ.get("TOFU_PROVIDERS_MIRROR_DIR", BASE_DIR / ".tofu" / "providers")
+)
+
+# Runner
+
+BOOTSTRAP_MAX_WORKERS_DEFAULT = 4
+
+PROCESS_OUTPUT_TAIL_LINES = 20
+
+PROCESS_STREAM_CHUNK_SIZE = 64 * 1024
+
+PROCESS_TERMINATE_TIMEOUT = 30
+
+RUNS_LOGS_DIR = Path(".logs")
+
+RUN_ID_PATTERN = r"\d+(?:-[0-9a-f]{8})?"
+
+JOURNAL_FILENAME = "journal.jsonl"
+
+TRACE_FILENAME = "trace.json"
+
+TRACE_OTLP_FILENAME = "trace.otlp.json"
+
+USAGE_FILENAME = "usage.json"
+
+# NOTE: options not affecting the created resources, ignored when resuming a run
+RUNNER_EXECUTION_OPTIONS = (
+    "bundle",
+    "gid",
+    "live_output",
+    "logs_dir",
+    "logs_retention",
+    "max_workers",
+    "plan_only",
+    "process_timeout",
+    "resume_run_id",
+    "terraform_dir",
+    "tofu_apply_retries",
+    "tofu_drift_check",
+    "tofu_log_compression",
+    "tofu_log_level",
+    "trace_otlp",
+    "uid",
+)
+
+# Bundle
+
+BUNDLE_VERSION = 1
+
+BUNDLE_MANIFEST_NAME = "manifest.json"
+
+BUNDLES_CACHE_DIR = BASE_DIR / ".bundles"
+
+TOFU_MODULES_DIR = BASE_DIR / "tofu"
+
+# Logs
+
+DIAGNOSTICS_ERROR_BYTES = 64 * 1024
+
+DIAGNOSTICS_ERROR_LINES = 15
+
+DIAGNOSTICS_SCAN_BYTES = 64 * 1024 * 1024
+
+# NOTE: 422s are returned by the tfe provider on resources readiness races
+RETRYABLE_HTTP_STATUSES = {422, 429, 500, 502, 503, 504}
+
+RETRYABLE_ERRORS = (
+    "Bad Gateway",
+    "Error acquiring the state lock",
+    "Gateway Timeout",
+    "Internal Server Error",
+    "Service Unavailable",
+    "TLS handshake timeout",
+    "connection refused",
+    "connection reset by peer",
+    "i/o timeout",
+    "Too Many Requests",
+)
+
+LOG_COMPRESSION_NONE = "none"
+
+LOG_COMPRESSION_GZIP = "gzip"
+
+LOG_COMPRESSION_CHOICES = [
+    LOG_COMPRESSION_NONE,
+    LOG_COMPRESSION_GZIP,
+]
+
+LOG_COMPRESSION_SUFFIXES = {
+    LOG_COMPRESSION_NONE: "",
+    LOG_COMPRESSION_GZIP: ".gz",
+}
+
 # Python
 
 PYTHON_VERSION_DEFAULT = "3.14"
 
 # Dump
 
+# NOTE: execution options are not dumped, since loaded dumps override the CLI ones
 DUMP_EXCLUDED_OPTIONS = (
+    *RUNNER_EXECUTION_OPTIONS,
     "backend_sentry_dsn",
     "digitalocean_token",
     "frontend_sentry_dsn",
@@ -0,0 +1,126 @@
+"""Extract the failure causes from the OpenTofu output and logs."""
+
+import mmap
+import re
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from bootstrap.constants import (
+    DIAGNOSTICS_ERROR_BYTES,
+    DIAGNOSTICS_ERROR_LINES,
+    DIAGNOSTICS_SCAN_BYTES,
+    RETRYABLE_ERRORS,
+    RETRYABLE_HTTP_STATUSES,
+)
+
+RESOURCE_ADDRESS_RE = re.compile(rb"^\s*with ([^,\n]+),$", re.M)
+
+# NOTE: patterns are keyed by their literal prefix, looked up without regex first
+HTTP_STATUS_RES = {
+    b"/api/v4/": re.compile(rb"/api/v4/\S*: ([45]\d\d)\b"),
+    b"Code: ": re.compile(rb"Code: ([45]\d\d)\b"),
+    b"HTTP/": re.compile(rb"HTTP/\d(?:\.\d)? ([45]\d\d)\b"),
+    b"status": re.compile(rb"status(?:[ _-]?code)?\"?[=: ]+\"?([45]\d\d)\b"),
+    b"Status": re.compile(rb"Status(?:[ _-]?Code)?\"?[=: ]+\"?([45]\d\d)\b"),
+}
+
+
+@dataclass(kw_only=True)
+class Diagnosis:
+    """The failure causes of an OpenTofu command."""
+
+    error: str | None = None
+    resource_address: str | None = None
+    http_status: int | None = None
+
+    def is_retryable(self):
+        """Tell if the failure is likely transient (e.g. rate limits, locks)."""
+        return self.http_status in RETRYABLE_HTTP_STATUSES or any(
+            retryable_error in (self.error or "")
+            for retryable_error in RETRYABLE_ERRORS
+        )
+
+    def render(self):
+        """Return a concise summary of the failure causes."""
+        lines = []
+        if self.error:
+            error_lines = self.error.splitlines()
+            lines.extend(error_lines[:DIAGNOSTICS_ERROR_LINES])
+            len(error_lines) > DIAGNOSTICS_ERROR_LINES and lines.append("[...]")
+        self.resource_address and lines.append(f"Resource: {self.resource_address}")
+        self.http_status and lines.append(f"HTTP status: {self.http_status}")
+        return "\n".join(lines)
+
+
+@contextmanager
+def map_file(path):
+    """Yield the memory mapped content of the given file, or empty bytes."""
+    try:
+        log_file = path.open("rb")
+    except OSError:
+        yield b""
+        return
+    with log_file:
+        try:
+            data = mmap.mmap(log_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # NOTE: empty files cannot be memory mapped
+            yield b""
+            return
+        with data:
+            yield data
+
+
+def find_error_block(data):
+    """Return the first error block in the head of the given data."""
+    end = min(len(data), DIAGNOSTICS_SCAN_BYTES)
+    start = 0
+    while (start := data.find(b"Error: ", start, end)) > 0 and data[start - 1] != 10:
+        start += 1
+    if start == -1:
+        return None
+    block_end = min(start + DIAGNOSTICS_ERROR_BYTES, len(data))
+    for marker in (b"\nError: ", b"\nWarning: "):
+        if (marker_start := data.find(marker, start, block_end)) != -1:
+            block_end = marker_start
+    return bytes(data[start:block_end])
+
+
+def find_last_http_status(data):
+    """Return the last HTTP error status in the tail of the given data."""
+    start = max(len(data) - DIAGNOSTICS_SCAN_BYTES, 0)
+    last_position, last_status = -1, None
+    for prefix, pattern in HTTP_STATUS_RES.items():
+        end = len(data)
+        while (position := data.rfind(prefix, start, end)) > last_position:
+            if match := pattern.match(data, position):
+                last_position, last_status = position, int(match.group(1))
+                break
+            end = position
+    return last_status
+
+
+def diagnose(stderr_path, log_path=None):
+    """Return the failure causes found in the given stderr and TF_LOG files.
+
+    Both files are memory mapped and only a bounded window of each is scanned:
+    the head of the stderr, where the first error is, and the tail of the
+    TF_LOG, where the last provider calls are. The HTTP status is looked up in
+    the error first (e.g. GitLab and Vault API errors), since the TF_LOG does
+    not log the provider calls below the DEBUG level, and compressed logs are
+    not scanned.
+    """
+    diagnosis = Diagnosis()
+    with map_file(stderr_path) as data:
+        error_block = find_error_block(data)
+    if error_block:
+        diagnosis.error = error_block.decode("utf-8", "replace").strip()
+        if address_match := RESOURCE_ADDRESS_RE.search(error_block):
+            diagnosis.resource_address = address_match.group(1).decode(
+                "utf-8", "replace"
+            )
+        diagnosis.http_status = find_last_http_status(error_block)
+    if not diagnosis.http_status and log_path and log_path.suffix == ".log":
+        with map_file(log_path) as data:
+            diagnosis.http_status = find_last_http_status(data)
+    return diagnosis
@@ -1,8 +1,14 @@
 """Web project initialization helpers."""
 
+import hashlib
 import json
+import os
 import re
-from functools import partial
+import secrets
+import shutil
+import subprocess
+import sys
+from functools import cache, partial
 from pathlib import Path
 from time import time
 
@@ -10,7 +16,15 @@ import click
 import validators
 from slugify import slugify
 
-from bootstrap.constants import DUMP_EXCLUDED_OPTIONS, DUMPS_DIR
+from bootstrap.constants import (
+    DUMP_EXCLUDED_OPTIONS,
+    DUMPS_DIR,
+    GIT_MIRRORS_DIR,
+    TEMPLATE_URL_REF_SEPARATOR,
+    TOFU_LOCK_FILENAME,
+    TRASH_DIR,
+)
+from bootstrap.exceptions import BootstrapError
 
 error = partial(click.style, fg="red")
 
@@ -29,12 +43,11 @@ class CollectorJSONEncoder(json.JSONEncoder):
 
 def format_gitlab_variable(value, masked=False, protected=True):
     """Format the given value to be used as a GitLab variable."""
-    return (
-        f'{{ value = "{value}"'
-        + (masked and ", masked = true" or "")
-        + (not protected and ", protected = false" or "")
-        + " }"
-    )
+    return {
+        "value": value,
+        **(masked and {"masked": True} or {}),
+        **(not protected and {"protected": False} or {}),
+    }
 
 
 def format_tfvar(value, value_type=None):
@@ -49,13 +62,148 @@ def format_tfvar(value, value_type=None):
         return f'"{value}"'
 
 
+def render_tofu_cli_config(mirror_dir):
+    """Return an OpenTofu CLI config installing the mirrored providers locally."""
+    providers = sorted(
+        "/".join(path.relative_to(mirror_dir).parts)
+        for path in mirror_dir.glob("*/*/*")
+        if path.is_dir()
+    )
+    if not providers:
+        return None
+    providers_list = json.dumps(providers)
+    return (
+        "provider_installation {\n"
+        "  filesystem_mirror {\n"
+        f"    path    = {json.dumps(str(mirror_dir.resolve()))}\n"
+        f"    include = {providers_list}\n"
+        "  }\n"
+        "  direct {\n"
+        f"    exclude = {providers_list}\n"
+        "  }\n"
+        "}\n"
+    )
+
+
+@cache
+def get_tofu_version():
+    """Return the installed OpenTofu version."""
+    try:
+        version = subprocess.run(
+            ["tofu", "version", "-json"], capture_output=True, check=True, text=True
+        )
+    except (OSError, subprocess.CalledProcessError) as e:
+        click.echo(error(f"Failed to get the OpenTofu version ({e})"))
+        raise BootstrapError from e
+    return json.loads(version.stdout)["terraform_version"]
+
+
+def get_tofu_module_hash(module_dir, tofu_version):
+    """Return a hash of the given OpenTofu module source, lock file and version."""
+    module_hash = hashlib.sha256(tofu_version.encode())
+    for path in sorted(
+        path
+        for pattern in ("*.tf", "*.tf.json", TOFU_LOCK_FILENAME)
+        for path in module_dir.glob(pattern)
+    ):
+        module_hash.update(path.name.encode() + b"\0")
+        module_hash.update(path.read_bytes() + b"\0")
+    return module_hash.hexdigest()
+
+
+def get_tofu_fingerprint(module_hash, variables):
+    """Return a fingerprint of the given OpenTofu module hash and variables."""
+    return hashlib.sha256(
+        (
+            module_hash
+            + json.dumps(variables, cls=CollectorJSONEncoder, sort_keys=True)
+        ).encode()
+    ).hexdigest()
+
+
+def count_tofu_plan_changes(plan):
+    """Return the count of the given OpenTofu JSON plan changes by action."""
+    changes = {"create": 0, "update": 0, "replace": 0, "delete": 0}
+    for resource_change in plan.get("resource_changes", []):
+        actions = resource_change["change"]["actions"]
+        if sorted(actions) == ["create", "delete"]:
+            changes["replace"] += 1
+        elif len(actions) == 1 and actions[0] in changes:
+            changes[actions[0]] += 1
+    return changes
+
+
+def split_template_url(template_url):
+    """Return the given template URL and its pinned revision, if any."""
+    url, _separator, ref = template_url.partition(TEMPLATE_URL_REF_SEPARATOR)
+    return url, ref or None
+
+
+def get_git_mirror_dir(url):
+    """Return the local bare mirror directory of the given repository URL."""
+    url_hash = hashlib.sha256(url.encode()).hexdigest()[:16]
+    return GIT_MIRRORS_DIR / f"{Path(url.rstrip('/')).stem}-{url_hash}.git"
+
+
+def get_requirements_hash(requirements_path):
+    """Return a hash of the given requirements file and the current interpreter."""
+    requirements_hash = hashlib.sha256(sys.implementation.cache_tag.encode())
+    requirements_hash.update(requirements_path.read_bytes())
+    return requirements_hash.hexdigest()[:16]
+
+
+def move_to_trash(path):
+    """Move the given directory to the trash, to be deleted in the background."""
+    TRASH_DIR.mkdir(exist_ok=True)
+    try:
+        path.rename(TRASH_DIR / f"{path.name}-{secrets.token_hex(4)}")
+    except FileNotFoundError:
+        pass
+    except OSError:
+        # NOTE: directories on other filesystems cannot be renamed
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def empty_trash():
+    """Delete the trash content in a detached process."""
+    if trash_paths := TRASH_DIR.is_dir() and list(TRASH_DIR.iterdir()):
+        subprocess.Popen(
+            [
+                sys.executable,
+                "-c",
+                "import shutil, sys\n"
+                "for path in sys.argv[1:]:\n"
+                "    shutil.rmtree(path, ignore_errors=True)",
+                *map(str, trash_paths),
+            ],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+
+
+def write_json(path, data, mode=0o666):
+    """Write the given data as JSON, replacing the given file at once."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{secrets.token_hex(4)}")
+    try:
+        with os.fdopen(
+            os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, mode), "w"
+        ) as f:
+            json.dump(data, f, default=str)
+        tmp_path.replace(path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
 def dump_options(options):
-    """Dump bootstrap options."""
+    """Dump bootstrap options, returning the dump path."""
     if click.confirm(
         warning("Would you like to dump the safe boostrap options?"),
     ):
         DUMPS_DIR.mkdir(exist_ok=True)
-        dump_path = DUMPS_DIR / f"{time():.0f}.json"
+        dump_path = DUMPS_DIR / f"{time():.0f}-{secrets.token_hex(4)}.json"
         dump_path.write_text(
             json.dumps(
                 {k: v for k, v in options.items() if k not in DUMP_EXCLUDED_OPTIONS},
@@ -63,6 +211,7 @@ def dump_options(options):
                 indent=2,
             )
         )
+        return dump_path
 
 
 def load_options():
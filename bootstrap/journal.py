@@ -0,0 +1,36 @@
+"""Record the bootstrap progress to resume interrupted runs."""
+
+import json
+import os
+from threading import Lock
+
+from bootstrap.helpers import CollectorJSONEncoder
+
+journal_lock = Lock()
+
+
+def append_journal_entry(journal_path, **entry):
+    """Append the given entry to the journal, readable by the owner only."""
+    line = json.dumps(entry, cls=CollectorJSONEncoder) + "\n"
+    with journal_lock, os.fdopen(
+        os.open(journal_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600), "a"
+    ) as journal_file:
+        journal_file.write(line)
+        journal_file.flush()
+        os.fsync(journal_file.fileno())
+
+
+def read_journal(journal_path):
+    """Return the journal entries, up to the first incomplete one."""
+    try:
+        lines = journal_path.read_text().splitlines()
+    except FileNotFoundError:
+        return []
+    entries = []
+    for line in lines:
+        try:
+            entries.append(json.loads(line))
+        except json.JSONDecodeError:
+            # NOTE: the last entry is truncated when the run was killed writing it
+            break
+    return entries
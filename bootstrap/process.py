@@ -0,0 +1,454 @@
+"""Run the bootstrap external processes."""
+
+import asyncio
+import gzip
+import io
+import json
+import os
+import select
+import shutil
+import signal
+import subprocess
+import sys
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from functools import partial
+from pathlib import Path
+from threading import Thread
+
+import click
+
+from bootstrap.constants import (
+    LOG_COMPRESSION_GZIP,
+    LOG_COMPRESSION_NONE,
+    PROCESS_OUTPUT_TAIL_LINES,
+    PROCESS_STREAM_CHUNK_SIZE,
+    PROCESS_TERMINATE_TIMEOUT,
+)
+from bootstrap.exceptions import BootstrapError
+from bootstrap.tracing import current_span
+
+error = partial(click.style, fg="red")
+
+info = partial(click.style, dim=True)
+
+# NOTE: set by the runner to collect the usage of the processes it waits for
+process_usages = ContextVar("process_usages", default=None)
+
+
+@dataclass(kw_only=True)
+class ProcessResult:
+    """The result of an external process."""
+
+    returncode: int
+    stderr_tail: list[str]
+
+
+@dataclass(kw_only=True)
+class ProcessUsage:
+    """The resources used by an external process and the children it waited for."""
+
+    user_seconds: float
+    system_seconds: float
+    max_rss_kb: int
+    block_reads: int
+    block_writes: int
+
+    @classmethod
+    def from_rusage(cls, rusage):
+        """Return the usage of the given resource usage struct."""
+        return cls(
+            user_seconds=round(rusage.ru_utime, 3),
+            system_seconds=round(rusage.ru_stime, 3),
+            # NOTE: the max RSS is in bytes on macOS, in kilobytes elsewhere
+            max_rss_kb=sys.platform == "darwin"
+            and rusage.ru_maxrss // 1024
+            or rusage.ru_maxrss,
+            block_reads=rusage.ru_inblock,
+            block_writes=rusage.ru_oublock,
+        )
+
+
+def watch_exit(pid):
+    """Return a file readable once the given process exits, without reaping it.
+
+    Linux uses a pidfd, the other platforms (e.g. macOS) a kqueue process filter.
+    """
+    if hasattr(os, "pidfd_open"):
+        return io.FileIO(os.pidfd_open(pid))
+    kqueue = select.kqueue()
+    kqueue.control(
+        [
+            select.kevent(
+                pid,
+                select.KQ_FILTER_PROC,
+                select.KQ_EV_ADD | select.KQ_EV_ONESHOT,
+                select.KQ_NOTE_EXIT,
+            )
+        ],
+        0,
+    )
+    return kqueue
+
+
+@dataclass(kw_only=True)
+class Process:
+    """An external process with asyncio streams, reaped along with its usage.
+
+    The process exit is watched by the event loop, and it is then reaped with
+    wait4, rather than by the asyncio child watcher, which does not return the
+    resource usage.
+    """
+
+    popen: subprocess.Popen
+    stdin: asyncio.StreamWriter | None = None
+    stdout: asyncio.StreamReader | None = None
+    stderr: asyncio.StreamReader | None = None
+    returncode: int | None = None
+    usage: ProcessUsage | None = None
+    exited: asyncio.Future = field(init=False)
+    exit_watch: object = field(init=False)
+
+    def __post_init__(self):
+        """Start watching the process exit."""
+        loop = asyncio.get_running_loop()
+        self.exited = loop.create_future()
+        self.exit_watch = watch_exit(self.pid)
+        loop.add_reader(self.exit_watch.fileno(), self.reap, loop)
+
+    @property
+    def pid(self):
+        """Return the process id."""
+        return self.popen.pid
+
+    def reap(self, loop):
+        """Reap the exited process, then set its exit code and usage."""
+        pid, status, rusage = os.wait4(self.pid, os.WNOHANG)
+        if not pid:
+            return
+        loop.remove_reader(self.exit_watch.fileno())
+        self.exit_watch.close()
+        # NOTE: tells the Popen object the process is over, so it is not waited
+        self.popen.returncode = os.waitstatus_to_exitcode(status)
+        self.returncode = self.popen.returncode
+        self.usage = ProcessUsage.from_rusage(rusage)
+        self.exited.done() or self.exited.set_result(self.returncode)
+
+    async def wait(self):
+        """Wait for the process to exit, return its exit code."""
+        return await asyncio.shield(self.exited)
+
+    def send_signal(self, signum):
+        """Send the given signal to the process, unless it has exited."""
+        self.returncode is None and os.kill(self.pid, signum)
+
+
+async def acreate_process(*args, stdin=None, stdout=None, stderr=None, **kwargs):
+    """Start a process, connecting its pipes to asyncio streams."""
+    loop = asyncio.get_running_loop()
+    popen = subprocess.Popen(args, stdin=stdin, stdout=stdout, stderr=stderr, **kwargs)
+    process = Process(popen=popen)
+    if popen.stdin:
+        transport, protocol = await loop.connect_write_pipe(
+            lambda: asyncio.StreamReaderProtocol(asyncio.StreamReader()), popen.stdin
+        )
+        process.stdin = asyncio.StreamWriter(transport, protocol, None, loop)
+    for name in ("stdout", "stderr"):
+        if pipe := getattr(popen, name):
+            reader = asyncio.StreamReader()
+            await loop.connect_read_pipe(
+                partial(asyncio.StreamReaderProtocol, reader), pipe
+            )
+            setattr(process, name, reader)
+    return process
+
+
+def record_usage(args, usage):
+    """Record the given process usage, in the current trace span phase."""
+    if (usages := process_usages.get()) is not None:
+        span = current_span.get()
+        usages.append(
+            {
+                "phase": span and span["name"],
+                "track": span and span["track"],
+                "command": Path(args[0]).name,
+                **asdict(usage),
+            }
+        )
+
+
+def sum_usage(usages):
+    """Sum the given processes usage, keeping the highest max RSS."""
+    return {
+        "processes": len(usages),
+        "user_seconds": round(sum(u["user_seconds"] for u in usages), 3),
+        "system_seconds": round(sum(u["system_seconds"] for u in usages), 3),
+        "max_rss_kb": max((u["max_rss_kb"] for u in usages), default=0),
+        "block_reads": sum(u["block_reads"] for u in usages),
+        "block_writes": sum(u["block_writes"] for u in usages),
+    }
+
+
+async def pump_stream(stream, log_path, tail=None, live=False):
+    """Copy the given stream to a log file, keeping or echoing its lines."""
+    pending = b""
+    with log_path.open("wb") as log_file:
+        while chunk := await stream.read(PROCESS_STREAM_CHUNK_SIZE):
+            log_file.write(chunk)
+            if tail is not None or live:
+                *lines, pending = (pending + chunk).split(b"\n")
+                [handle_output_line(line, tail, live) for line in lines]
+    pending and handle_output_line(pending, tail, live)
+
+
+def handle_output_line(line, tail=None, live=False):
+    """Keep the given output line in the tail, and echo it if live."""
+    text = line.decode("utf-8", "replace")
+    tail is not None and tail.append(text)
+    live and click.echo(info(text))
+
+
+def echo_stream_line(line, prefix, err=False):
+    """Echo the given output line, starting with the given prefix."""
+    click.echo(prefix + line.decode("utf-8", "replace"), err=err)
+
+
+async def echo_stream(stream, prefix, err=False):
+    """Echo the lines of the given stream, each one starting with the given prefix."""
+    pending = b""
+    while chunk := await stream.read(PROCESS_STREAM_CHUNK_SIZE):
+        *lines, pending = (pending + chunk).split(b"\n")
+        [echo_stream_line(line, prefix, err) for line in lines]
+    pending and echo_stream_line(pending, prefix, err)
+
+
+def signal_process(process, signum, group=False):
+    """Send the given signal to the given process, or to its whole group."""
+    try:
+        if group:
+            os.killpg(process.pid, signum)
+        else:
+            process.send_signal(signum)
+    except ProcessLookupError:
+        pass
+
+
+async def read_events(read_fd, events):
+    """Read the JSON lines events from the given pipe into the given list."""
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    transport, _protocol = await loop.connect_read_pipe(
+        lambda: asyncio.StreamReaderProtocol(reader), os.fdopen(read_fd, "rb", 0)
+    )
+    pending = b""
+    try:
+        while chunk := await reader.read(PROCESS_STREAM_CHUNK_SIZE):
+            *lines, pending = (pending + chunk).split(b"\n")
+            events.extend(json.loads(line) for line in lines if line)
+    finally:
+        transport.close()
+
+
+async def terminate_process(process, group=False, pumps=()):
+    """Terminate the given process, killing it if it does not exit in time.
+
+    A process group is interrupted as a whole, like on Ctrl-C, so that its
+    processes can stop gracefully. Its remaining output is still consumed.
+    """
+    if process.returncode is None:
+        signal_process(process, group and signal.SIGINT or signal.SIGTERM, group)
+        try:
+            await asyncio.wait_for(process.wait(), PROCESS_TERMINATE_TIMEOUT)
+        except TimeoutError:
+            signal_process(process, signal.SIGKILL, group)
+            await process.wait()
+    pumps and await asyncio.wait(pumps, timeout=PROCESS_TERMINATE_TIMEOUT)
+    [pump.cancel() for pump in pumps]
+
+
+async def wait_process(process, args, timeout=None, pumps=(), group=False):
+    """Wait for the given process and its output, up to the given timeout.
+
+    The process is terminated when the timeout expires or the wait is cancelled.
+    Its resource usage is recorded once it is over.
+    """
+    pumps = [asyncio.ensure_future(pump) for pump in pumps]
+    try:
+        async with asyncio.timeout(timeout):
+            await asyncio.gather(process.wait(), *map(asyncio.shield, pumps))
+    except TimeoutError as e:
+        await asyncio.shield(terminate_process(process, group, pumps))
+        click.echo(error(f"'{' '.join(map(str, args))}' timed out after {timeout}s"))
+        raise BootstrapError from e
+    except asyncio.CancelledError:
+        await asyncio.shield(terminate_process(process, group, pumps))
+        raise
+    finally:
+        process.usage and record_usage(args, process.usage)
+    return process.returncode
+
+
+async def arun_process(
+    args,
+    *,
+    stdout_path,
+    stderr_path,
+    live=False,
+    tail_lines=PROCESS_OUTPUT_TAIL_LINES,
+    timeout=None,
+    **kwargs,
+):
+    """Run a process streaming its output to the given log files.
+
+    Only the last lines of the standard error are kept in memory, to be shown
+    when the process fails; all output lines are echoed when live is set.
+    """
+    stderr_tail = deque(maxlen=tail_lines)
+    process = await acreate_process(
+        *args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, **kwargs
+    )
+    returncode = await wait_process(
+        process,
+        args,
+        timeout,
+        (
+            pump_stream(process.stdout, stdout_path, None, live),
+            pump_stream(process.stderr, stderr_path, stderr_tail, live),
+        ),
+    )
+    return ProcessResult(returncode=returncode, stderr_tail=list(stderr_tail))
+
+
+async def acapture_process(args, *, timeout=None, **kwargs):
+    """Run a process capturing its output, which is returned as text."""
+    process = await acreate_process(
+        *args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, **kwargs
+    )
+    communicate = asyncio.ensure_future(
+        asyncio.gather(process.stdout.read(), process.stderr.read())
+    )
+    await wait_process(process, args, timeout, (communicate,))
+    stdout, stderr = communicate.result()
+    return subprocess.CompletedProcess(
+        args, process.returncode, stdout.decode(), stderr.decode()
+    )
+
+
+async def acall_process(args, *, timeout=None, prefix=None, group=False, **kwargs):
+    """Run a process sharing the current standard streams, return its exit code.
+
+    The output lines start with the given prefix, if any, to tell apart the
+    output of concurrent processes. With group set, the process runs in its own
+    process group, which is interrupted as a whole when the wait is cancelled.
+    """
+    prefix is not None and kwargs.update(stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    group and kwargs.update(process_group=0)
+    process = await acreate_process(*args, **kwargs)
+    pumps = prefix is not None and (
+        echo_stream(process.stdout, prefix),
+        echo_stream(process.stderr, prefix, err=True),
+    )
+    return await wait_process(process, args, timeout, pumps or (), group)
+
+
+@dataclass(kw_only=True)
+class Worker:
+    """A worker process, receiving JSON data and sending JSON lines events."""
+
+    args: list
+    process: Process
+    pumps: list = field(default_factory=list)
+    events: list = field(default_factory=list)
+
+
+async def astart_worker(args, *, prefix, **kwargs):
+    """Start a worker process in its own process group, return the worker.
+
+    The number of the file descriptor the worker writes its events to is
+    appended to the arguments, and its output lines start with the given prefix.
+    """
+    read_fd, write_fd = os.pipe()
+    try:
+        process = await acreate_process(
+            *args,
+            str(write_fd),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            pass_fds=(write_fd,),
+            process_group=0,
+            **kwargs,
+        )
+    except BaseException:
+        os.close(read_fd)
+        raise
+    finally:
+        os.close(write_fd)
+    worker = Worker(args=[*args, str(write_fd)], process=process)
+    worker.pumps = [
+        asyncio.ensure_future(echo_stream(process.stdout, prefix)),
+        asyncio.ensure_future(echo_stream(process.stderr, prefix, err=True)),
+        asyncio.ensure_future(read_events(read_fd, worker.events)),
+    ]
+    return worker
+
+
+async def arun_worker(worker, data, timeout=None):
+    """Send the given data to the worker and wait for it, return its exit code."""
+    try:
+        worker.process.stdin.write(json.dumps(data).encode())
+        await worker.process.stdin.drain()
+    except ConnectionError:
+        # NOTE: the worker exited early, its exit code tells why
+        pass
+    worker.process.stdin.close()
+    return await wait_process(worker.process, worker.args, timeout, worker.pumps, True)
+
+
+async def astop_worker(worker):
+    """Stop the given unused worker, terminating it if it does not exit in time."""
+    worker.process.stdin.close()
+    try:
+        async with asyncio.timeout(PROCESS_TERMINATE_TIMEOUT):
+            await asyncio.gather(worker.process.wait(), *worker.pumps)
+    except TimeoutError:
+        await terminate_process(worker.process, True, worker.pumps)
+
+
+def open_compressed_log(log_path, compression):
+    """Open the given log path for writing with the given compression."""
+    if compression == LOG_COMPRESSION_GZIP:
+        return gzip.open(log_path, "wb")
+    return log_path.open("wb")
+
+
+@contextmanager
+def compressed_log(log_path, compression=LOG_COMPRESSION_NONE):
+    """Yield a path whose written content is compressed to the given log path.
+
+    Processes writing a log by path (e.g. TF_LOG_PATH) get a named pipe, which is
+    drained by a thread compressing the content while it is written.
+    """
+    if compression == LOG_COMPRESSION_NONE:
+        yield log_path
+        return
+    log_file = open_compressed_log(log_path, compression)
+    fifo_path = log_path.with_name(f".{log_path.name}.fifo")
+    os.mkfifo(fifo_path, 0o600)
+    # NOTE: a placeholder writer keeps the pipe open until the process is over
+    read_fd = os.open(fifo_path, os.O_RDONLY | os.O_NONBLOCK)
+    write_fd = os.open(fifo_path, os.O_WRONLY | os.O_NONBLOCK)
+    os.set_blocking(read_fd, True)
+    reader = Thread(
+        target=lambda: shutil.copyfileobj(os.fdopen(read_fd, "rb"), log_file)
+    )
+    reader.start()
+    try:
+        yield fifo_path
+    finally:
+        os.close(write_fd)
+        reader.join()
+        log_file.close()
+        fifo_path.unlink()
@@ -1,29 +1,42 @@
 """Run the bootstrap."""
 
+import asyncio
 import base64
+import hashlib
 import json
 import os
+import random
 import re
+import resource
 import secrets
 import shutil
-import subprocess
-from dataclasses import dataclass, field
+import sys
+import urllib.request
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field, fields
 from functools import partial
 from pathlib import Path
-from time import time
+from time import monotonic, perf_counter, time
 
 import click
 from cookiecutter.main import cookiecutter
 from pydantic import validate_arguments
 
+from bootstrap.bundle import open_bundle
 from bootstrap.constants import (
     BACKEND_TEMPLATE_URLS,
+    BOOTSTRAP_MAX_WORKERS_DEFAULT,
     DEV_ENV_NAME,
     DEV_ENV_SLUG,
-    DUMPS_DIR,
     ENV_TO_CLUSTER_DEFAULT,
     FRONTEND_TEMPLATE_URLS,
+    GIT_COMMIT_SHA_PATTERN,
+    GIT_MIRROR_MAX_AGE,
+    GIT_MIRRORS_DIR,
     GITLAB_URL_DEFAULT,
+    JOURNAL_FILENAME,
+    LOG_COMPRESSION_NONE,
+    LOG_COMPRESSION_SUFFIXES,
     MEDIA_STORAGE_DIGITALOCEAN_S3,
     MINOS_PLATFORM_IMAGE,
     MINOS_SERVICE_IMAGE,
@@ -32,14 +45,69 @@ from bootstrap.constants import (
     PROD_ENV_NAME,
     PROD_ENV_SLUG,
     PYTHON_VERSION_DEFAULT,
+    RUN_ID_PATTERN,
+    RUNNER_EXECUTION_OPTIONS,
+    RUNS_LOGS_DIR,
     SERVICE_SLUG_DEFAULT,
     STAGE_ENV_NAME,
     STAGE_ENV_SLUG,
+    SUBREPO_WORKER_PATH,
     SUBREPOS_DIR,
+    SUBREPOS_VENVS_DIR,
     TERRAFORM_BACKEND_TFC,
+    TFC_PROJECT_READY_INTERVAL,
+    TFC_PROJECT_READY_TIMEOUT,
+    TFC_PROJECT_TARGETS,
+    TOFU_APPLY_RETRIES_DEFAULT,
+    TOFU_INIT_CACHE_DIR,
+    TOFU_LOCK_FILENAME,
+    TOFU_LOG_LEVEL_DEFAULT,
+    TOFU_LOG_LEVEL_OFF,
+    TOFU_MODULES_DIR,
+    TOFU_PLAN_PLACEHOLDER,
+    TOFU_PLUGIN_CACHE_DIR,
+    TOFU_PROVIDERS_MIRROR_DIR,
+    TOFU_RETRY_BACKOFF_BASE,
+    TOFU_RETRY_BACKOFF_MAX,
+    TOFU_SECRETS_FILENAME,
+    TOFU_STATES_DIR,
+    TOFU_TFVARS_FILENAME,
+    TRACE_FILENAME,
+    TRACE_OTLP_FILENAME,
+    USAGE_FILENAME,
+    UV_CACHE_DIR,
 )
+from bootstrap.diagnostics import diagnose
 from bootstrap.exceptions import BootstrapError
-from bootstrap.helpers import format_gitlab_variable
+from bootstrap.helpers import (
+    CollectorJSONEncoder,
+    count_tofu_plan_changes,
+    empty_trash,
+    format_gitlab_variable,
+    get_git_mirror_dir,
+    get_requirements_hash,
+    get_tofu_fingerprint,
+    get_tofu_module_hash,
+    move_to_trash,
+    render_tofu_cli_config,
+    split_template_url,
+    write_json,
+)
+from bootstrap.journal import append_journal_entry, read_journal
+from bootstrap.process import (
+    ProcessUsage,
+    acall_process,
+    acapture_process,
+    arun_process,
+    arun_worker,
+    astart_worker,
+    astop_worker,
+    compressed_log,
+    process_usages,
+    sum_usage,
+)
+from bootstrap.scheduler import Step, acall, arun_steps, get_requirements
+from bootstrap.tracing import Tracer
 
 error = partial(click.style, fg="red")
 
@@ -132,21 +200,50 @@ class Runner:
     gid: int | None = None
     terraform_dir: Path | None = None
     logs_dir: Path | None = None
+    max_workers: int = BOOTSTRAP_MAX_WORKERS_DEFAULT
+    live_output: bool = False
+    tofu_log_level: str = TOFU_LOG_LEVEL_DEFAULT
+    tofu_log_compression: str = LOG_COMPRESSION_NONE
+    logs_retention: int | None = None
+    tofu_apply_retries: int = TOFU_APPLY_RETRIES_DEFAULT
+    tofu_drift_check: bool = False
+    process_timeout: int | None = None
+    plan_only: bool = False
+    resume_run_id: str | None = None
+    bundle: Path | None = None
+    trace_otlp: bool = False
     run_id: str = field(init=False)
+    tofu_version: str | None = field(init=False, default=None)
+    runs_logs_dir: Path | None = field(init=False, default=None)
     service_slug: str = field(init=False)
     envs: list = field(init=False, default_factory=list)
     gitlab_variables: dict = field(init=False, default_factory=dict)
     vault_secrets: dict = field(init=False, default_factory=dict)
     terraform_run_modules: list = field(init=False, default_factory=list)
     terraform_outputs: dict = field(init=False, default_factory=dict)
+    completed_steps: set = field(init=False, default_factory=set)
+    terraform_plans: dict = field(init=False, default_factory=dict)
+    subrepo_workers: dict = field(init=False, default_factory=dict)
+    subrepo_events: dict = field(init=False, default_factory=dict)
+    tracer: Tracer = field(init=False)
+    process_usages: list = field(init=False, default_factory=list)
 
     def __post_init__(self):
         """Finalize initialization."""
         self.service_slug = SERVICE_SLUG_DEFAULT
         self.gitlab_url = self.gitlab_url and self.gitlab_url.rstrip("/")
-        self.run_id = f"{time():.0f}"
-        self.terraform_dir = self.terraform_dir or Path(f".terraform/{self.run_id}")
-        self.logs_dir = self.logs_dir or Path(f".logs/{self.run_id}")
+        # NOTE: a random suffix keeps the runs started in the same second apart
+        self.run_id = self.resume_run_id or f"{time():.0f}-{secrets.token_hex(4)}"
+        # NOTE: paths are absolute since cookiecutter changes the working directory
+        self.output_dir = self.output_dir.resolve()
+        self.service_dir = self.service_dir.resolve()
+        self.terraform_dir = (
+            self.terraform_dir or Path(f".terraform/{self.run_id}")
+        ).resolve()
+        # NOTE: only the default runs logs are pruned, a custom logs dir is kept
+        self.runs_logs_dir = not self.logs_dir and RUNS_LOGS_DIR.resolve() or None
+        self.logs_dir = (self.logs_dir or RUNS_LOGS_DIR / self.run_id).resolve()
+        self.tracer = Tracer(track=self.service_slug)
 
     def set_envs(self):
         """Set the envs."""
@@ -209,6 +306,28 @@ class Runner:
         """Register one or more GitLab project variable."""
         self.register_gitlab_variables("project", *vars)
 
+    def get_generated_secret(self, name):
+        """Return the given generated secret, reusing the one of the previous runs.
+
+        Generated secrets are persisted along with the project Terraform states,
+        so that re-runs neither rotate the live passwords nor change the modules
+        fingerprint.
+        """
+        secrets_path = (
+            TOFU_STATES_DIR
+            / self.project_slug
+            / self.service_slug
+            / TOFU_SECRETS_FILENAME
+        )
+        try:
+            generated_secrets = json.loads(secrets_path.read_text())
+        except FileNotFoundError:
+            generated_secrets = {}
+        if name not in generated_secrets:
+            generated_secrets[name] = secrets.token_urlsafe(12)
+            write_json(secrets_path, generated_secrets, 0o600)
+        return generated_secrets[name]
+
     def collect_gitlab_variables(self):
         """Collect the GitLab group and project variables."""
         if self.pact_broker_url:
@@ -224,7 +343,7 @@ class Runner:
         """Collect secrets as GitLab group and project variables."""
         self.register_gitlab_group_variables(
             ("BASIC_AUTH_USERNAME", self.project_slug),
-            ("BASIC_AUTH_PASSWORD", secrets.token_urlsafe(12), True),
+            ("BASIC_AUTH_PASSWORD", self.get_generated_secret("basic_auth"), True),
         )
         self.sentry_org and self.register_gitlab_group_variables(
             ("SENTRY_AUTH_TOKEN", self.sentry_auth_token, True)
@@ -250,7 +369,7 @@ class Runner:
             )
         if self.subdomain_monitoring:
             self.register_gitlab_project_variables(
-                ("GRAFANA_PASSWORD", secrets.token_urlsafe(12), True)
+                ("GRAFANA_PASSWORD", self.get_generated_secret("grafana"), True)
             )
         self.digitalocean_token and self.register_gitlab_group_variables(
             ("DIGITALOCEAN_TOKEN", self.digitalocean_token, True)
@@ -274,12 +393,6 @@ class Runner:
                 and self.register_gitlab_group_variables(("S3_HOST", self.s3_host))
             )
 
-    def render_gitlab_variables_to_string(self, level):
-        """Return the given level GitLab variables rendered to string."""
-        return "{%s}" % ", ".join(
-            f"{k} = {v}" for k, v in self.gitlab_variables.get(level, {}).items()
-        )
-
     def register_vault_platform_secret(self, cluster_slug, secret_name, secret_data):
         """Register a Vault platform secret at platforms/{cluster}/{name}."""
         self.vault_secrets[f"platforms/{cluster_slug}/{secret_name}"] = secret_data
@@ -309,7 +422,9 @@ class Runner:
             f"{self.service_slug}/basic_auth",
             {
                 "basic_auth_username": self.project_slug,
-                "basic_auth_password": secrets.token_urlsafe(12),
+                "basic_auth_password": self.get_generated_secret(
+                    f"envs/{env_name}/basic_auth"
+                ),
             },
         )
         # Sentry secrets are used by the GitLab CI/CD
@@ -363,34 +478,36 @@ class Runner:
                 for provider in providers
             }
         )
-        cookiecutter(
-            os.path.dirname(os.path.dirname(__file__)),
-            extra_context={
-                "backend_service_port": self.backend_service_port,
-                "backend_service_slug": self.backend_service_slug,
-                "backend_type": self.backend_type,
-                "frontend_service_port": self.frontend_service_port,
-                "frontend_service_slug": self.frontend_service_slug,
-                "frontend_type": self.frontend_type,
-                "media_storage": self.media_storage,
-                "minos_platform_image": self.minos_platform_image,
-                "minos_service_image": self.minos_service_image,
-                "opentofu_component_version": self.opentofu_component_version,
-                "opentofu_version": self.opentofu_version,
-                "project_dirname": self.project_dirname,
-                "project_name": self.project_name,
-                "project_slug": self.project_slug,
-                "python_version": self.python_version,
-                "resources": {"envs": self.envs, "core_providers": core_providers},
-                "service_slug": self.service_slug,
-                "terraform_backend": self.terraform_backend,
-                "terraform_cloud_organization": self.terraform_cloud_organization,
-                "use_pact": self.pact_broker_url and "true" or "false",
-                "use_vault": self.vault_url and "true" or "false",
-            },
-            output_dir=self.output_dir,
-            no_input=True,
-        )
+        with self.tracer.span("cookiecutter"):
+            cookiecutter(
+                os.path.dirname(os.path.dirname(__file__)),
+                extra_context={
+                    "backend_service_port": self.backend_service_port,
+                    "backend_service_slug": self.backend_service_slug,
+                    "backend_type": self.backend_type,
+                    "frontend_service_port": self.frontend_service_port,
+                    "frontend_service_slug": self.frontend_service_slug,
+                    "frontend_type": self.frontend_type,
+                    "media_storage": self.media_storage,
+                    "minos_platform_image": self.minos_platform_image,
+                    "minos_service_image": self.minos_service_image,
+                    "opentofu_component_version": self.opentofu_component_version,
+                    "opentofu_version": self.opentofu_version,
+                    "project_dirname": self.project_dirname,
+                    "project_name": self.project_name,
+                    "project_slug": self.project_slug,
+                    "python_version": self.python_version,
+                    "resources": {"envs": self.envs, "core_providers": core_providers},
+                    "service_slug": self.service_slug,
+                    "terraform_backend": self.terraform_backend,
+                    "terraform_cloud_organization": self.terraform_cloud_organization,
+                    "use_pact": self.pact_broker_url and "true" or "false",
+                    "use_vault": self.vault_url and "true" or "false",
+                },
+                output_dir=self.output_dir,
+                no_input=True,
+                overwrite_if_exists=bool(self.resume_run_id),
+            )
         self.render_minos_per_cluster_files()
 
     def render_minos_per_cluster_files(self):
@@ -449,9 +566,35 @@ class Runner:
         )
         (self.service_dir / ".env").write_text(env_text)
 
-    def init_gitlab(self):
-        """Initialize the GitLab resources."""
-        click.echo(info("...creating the GitLab resources with Terraform"))
+    def get_module_env(self, module_name):
+        """Return the given Terraform module env vars, built from the options.
+
+        The env holds the tokens, so it is never journaled but built again when
+        resuming a run, whose options are unchanged.
+        """
+        if module_name == "terraform-cloud":
+            return {
+                "TF_VAR_admin_email": self.terraform_cloud_admin_email,
+                "TF_VAR_create_organization": self.terraform_cloud_organization_create
+                and "true"
+                or "false",
+                "TF_VAR_hostname": self.terraform_cloud_hostname,
+                "TF_VAR_organization_name": self.terraform_cloud_organization,
+                "TF_VAR_project_name": self.project_name,
+                "TF_VAR_project_slug": self.project_slug,
+                "TF_VAR_terraform_cloud_token": self.terraform_cloud_token,
+            }
+        if module_name == "vault":
+            env = {
+                "TF_VAR_project_name": self.project_name,
+                "TF_VAR_project_slug": self.project_slug,
+                "TF_VAR_vault_address": self.vault_url,
+                "TF_VAR_vault_token": self.vault_token,
+            }
+            self.terraform_backend == TERRAFORM_BACKEND_TFC and env.update(
+                TF_VAR_terraform_cloud_token=self.terraform_cloud_token
+            )
+            return env
         env = {
             "TF_VAR_gitlab_url": self.gitlab_url,
             "TF_VAR_gitlab_token": self.gitlab_token,
@@ -460,196 +603,572 @@ class Runner:
             "TF_VAR_group_namespace_path": self.gitlab_namespace_path,
             "TF_VAR_group_owners": self.gitlab_group_owners,
             "TF_VAR_group_slug": self.gitlab_group_slug,
-            "TF_VAR_group_variables": self.render_gitlab_variables_to_string("group"),
             "TF_VAR_local_repository_dir": self.service_dir,
             "TF_VAR_project_description": (
                 f'The "{self.project_name}" project {self.service_slug} service.'
             ),
             "TF_VAR_project_name": self.service_slug.title(),
             "TF_VAR_project_slug": self.service_slug,
-            "TF_VAR_project_variables": self.render_gitlab_variables_to_string(
-                "project"
-            ),
             "TF_VAR_use_vault": self.vault_url and "true" or "false",
         }
         self.gitlab_url != GITLAB_URL_DEFAULT and env.update(
             GITLAB_BASE_URL=f"{self.gitlab_url}/api/v4/"
         )
-        self.run_terraform(
-            "gitlab", env, outputs=["registry_password", "registry_username"]
+        return env
+
+    async def init_gitlab(self):
+        """Initialize the GitLab resources."""
+        click.echo(info("...creating the GitLab resources with Terraform"))
+        await self.run_terraform(
+            "gitlab",
+            self.get_module_env("gitlab"),
+            outputs=["registry_password", "registry_username"],
+            tfvars={
+                "group_variables": self.gitlab_variables.get("group", {}),
+                "project_variables": self.gitlab_variables.get("project", {}),
+            },
         )
 
-    def init_terraform_cloud(self):
+    async def init_terraform_cloud(self):
         """Initialize the Terraform Cloud resources."""
         click.echo(info("...creating the Terraform Cloud resources with Terraform"))
-        env = {
-            "TF_VAR_admin_email": self.terraform_cloud_admin_email,
-            "TF_VAR_cluster_core_providers": json.dumps(self.cluster_core_providers or {}),
-            "TF_VAR_clusters": json.dumps(self.clusters or []),
-            "TF_VAR_create_organization": self.terraform_cloud_organization_create
-            and "true"
-            or "false",
-            "TF_VAR_hostname": self.terraform_cloud_hostname,
-            "TF_VAR_organization_name": self.terraform_cloud_organization,
-            "TF_VAR_project_name": self.project_name,
-            "TF_VAR_project_slug": self.project_slug,
-            "TF_VAR_terraform_cloud_token": self.terraform_cloud_token,
-            # Serialize workspace creation: tfe provider races on tfe_project readiness
-            # when creating multiple workspaces in parallel, returning sporadic 422s.
-            "TF_CLI_ARGS_apply": "-parallelism=1",
-        }
-        self.run_terraform("terraform-cloud", env)
+        await self.run_terraform(
+            "terraform-cloud",
+            self.get_module_env("terraform-cloud"),
+            before_apply=self.apply_terraform_cloud_project,
+            tfvars={
+                "cluster_core_providers": self.cluster_core_providers or {},
+                "clusters": self.clusters or [],
+            },
+        )
+
+    async def apply_terraform_cloud_project(
+        self, cwd, env, logs_dir, state_path, var_file
+    ):
+        """Create the Terraform Cloud project and wait for it to be ready.
+
+        Workspaces created in parallel race on the project readiness, so the
+        organization and project are applied first, on their own.
+        """
+        await self.run_terraform_apply(
+            cwd, env, logs_dir, state_path, var_file, targets=TFC_PROJECT_TARGETS
+        )
+        state = json.loads(state_path.read_text())
+        project_id = next(
+            (
+                resource["instances"][0]["attributes"]["id"]
+                for resource in state.get("resources", [])
+                if resource["mode"] == "managed"
+                and resource["type"] == "tfe_project"
+                and resource["name"] == "main"
+                and resource["instances"]
+            ),
+            None,
+        )
+        if not project_id:
+            click.echo(error("The Terraform Cloud project is missing from the state."))
+            raise BootstrapError
+        request = urllib.request.Request(
+            f"https://{self.terraform_cloud_hostname}/api/v2/projects/{project_id}",
+            headers={
+                "Authorization": f"Bearer {self.terraform_cloud_token}",
+                "Content-Type": "application/vnd.api+json",
+            },
+        )
+        deadline = monotonic() + TFC_PROJECT_READY_TIMEOUT
+        while True:
+            try:
+                response = await asyncio.to_thread(
+                    urllib.request.urlopen, request, timeout=10
+                )
+                response.close()
+                return
+            except OSError:
+                if monotonic() > deadline:
+                    # NOTE: transient workspaces creation failures are retried
+                    click.echo(warning("Terraform Cloud project readiness unknown."))
+                    return
+                await asyncio.sleep(TFC_PROJECT_READY_INTERVAL)
 
-    def init_vault(self):
+    async def init_vault(self):
         """Initialize the Vault resources."""
         click.echo(info("...creating the Vault resources with Terraform"))
         # NOTE: Vault secrets collection must be done AFTER GitLab init
         self.collect_vault_secrets()
-        env = {
-            "TF_VAR_project_name": self.project_name,
-            "TF_VAR_project_slug": self.project_slug,
-            "TF_VAR_secrets": json.dumps(self.vault_secrets),
-            "TF_VAR_vault_address": self.vault_url,
-            "TF_VAR_vault_token": self.vault_token,
-        }
-        self.terraform_backend == TERRAFORM_BACKEND_TFC and env.update(
-            TF_VAR_terraform_cloud_token=self.terraform_cloud_token
+        await self.run_terraform(
+            "vault",
+            self.get_module_env("vault"),
+            tfvars={"secrets": self.vault_secrets},
         )
-        self.run_terraform("vault", env)
+
+    async def fetch_tofu_version(self):
+        """Fetch the installed OpenTofu version, which the modules caches depend on."""
+        with self.tracer.span("tofu version"):
+            try:
+                version = await acapture_process(
+                    ["tofu", "version", "-json"], timeout=self.process_timeout
+                )
+            except OSError as e:
+                click.echo(error(f"OpenTofu is not available ({e})"))
+                raise BootstrapError from e
+        if version.returncode != 0:
+            click.echo(error("Failed to get the OpenTofu version"))
+            click.echo(version.stderr)
+            raise BootstrapError
+        self.tofu_version = json.loads(version.stdout)["terraform_version"]
+
+    def get_tofu_env(self):
+        """Return the OpenTofu env vars shared by all modules and subrepos."""
+        TOFU_PLUGIN_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        providers_mirror_dir = (
+            self.bundle
+            and open_bundle(self.bundle).extract("providers")
+            or TOFU_PROVIDERS_MIRROR_DIR
+        )
+        tofu_env = {
+            "TF_PLUGIN_CACHE_DIR": str(TOFU_PLUGIN_CACHE_DIR.resolve()),
+            "TOFU_PROVIDERS_MIRROR_DIR": str(providers_mirror_dir.resolve()),
+        }
+        if cli_config := render_tofu_cli_config(providers_mirror_dir):
+            cli_config_path = self.terraform_dir / "tofurc"
+            if not cli_config_path.is_file():
+                os.makedirs(self.terraform_dir, exist_ok=True)
+                # NOTE: written atomically since modules are initialized concurrently
+                tmp_path = cli_config_path.with_name(f"tofurc.{secrets.token_hex(4)}")
+                tmp_path.write_text(cli_config)
+                tmp_path.replace(cli_config_path)
+            tofu_env["TF_CLI_CONFIG_FILE"] = str(cli_config_path.resolve())
+        return tofu_env
+
+    def get_terraform_module_dir(self, module_name):
+        """Return the given Terraform module source dir."""
+        return TOFU_MODULES_DIR / module_name
 
     def get_terraform_module_params(self, module_name, env):
-        """Return Terraform parameters for the given module."""
+        """Return Terraform parameters for the given module.
+
+        Modules run from a copy of their source, made by init, since init writes
+        the lock file when it is not committed.
+        """
+        terraform_dir = self.terraform_dir / self.service_slug / module_name
         return (
-            Path(__file__).parent.parent / "tofu" / module_name,
+            terraform_dir / "module",
             self.logs_dir / self.service_slug / "tofu" / module_name,
-            terraform_dir := self.terraform_dir / self.service_slug / module_name,
+            terraform_dir,
             {
                 **env,
+                **self.get_tofu_env(),
                 "PATH": os.environ.get("PATH"),
                 "TF_DATA_DIR": str((terraform_dir / "data").resolve()),
-                "TF_LOG": "INFO",
             },
         )
 
-    def run_terraform_init(self, cwd, env, logs_dir, state_path):
-        """Run Terraform init."""
-        init_log_path = logs_dir / "init.log"
-        init_stdout_path = logs_dir / "init-stdout.log"
-        init_stderr_path = logs_dir / "init-stderr.log"
-        init_process = subprocess.run(
-            [
-                "tofu",
-                "init",
-                "-backend-config",
-                f"path={state_path.resolve()}",
-                "-input=false",
-                "-no-color",
-            ],
-            capture_output=True,
-            cwd=cwd,
-            env=dict(**env, TF_LOG_PATH=str(init_log_path.resolve())),
-            text=True,
-        )
-        init_stdout_path.write_text(init_process.stdout)
-        if init_process.returncode != 0:
-            init_stderr_path.write_text(init_process.stderr)
+    @contextmanager
+    def tofu_log(self, log_path):
+        """Yield the env vars to write the Terraform log, and its actual path."""
+        if self.tofu_log_level == TOFU_LOG_LEVEL_OFF:
+            yield {}, None
+            return
+        log_path = log_path.with_name(
+            log_path.name + LOG_COMPRESSION_SUFFIXES[self.tofu_log_compression]
+        )
+        with compressed_log(log_path, self.tofu_log_compression) as stream_path:
+            yield {
+                "TF_LOG": self.tofu_log_level,
+                "TF_LOG_PATH": str(stream_path.resolve()),
+            }, log_path
+
+    async def run_tofu(
+        self,
+        command,
+        args,
+        cwd,
+        env,
+        logs_dir,
+        retries=0,
+        log_name=None,
+        returncodes=(0,),
+    ):
+        """Run the given Terraform command logging to the given dir.
+
+        Transient failures are retried up to the given times on the same state,
+        with a jittered exponential backoff.
+        """
+        log_name = log_name or command
+        for attempt in range(retries + 1):
+            name = attempt and f"{log_name}-retry{attempt}" or log_name
+            stdout_path = logs_dir / f"{name}-stdout.log"
+            stderr_path = logs_dir / f"{name}-stderr.log"
+            with self.tofu_log(logs_dir / f"{name}.log") as (log_env, log_path):
+                with self.tracer.span(
+                    f"tofu {command}", module=Path(cwd).name, attempt=attempt
+                ) as span:
+                    process = await arun_process(
+                        ["tofu", command, *args],
+                        stdout_path=stdout_path,
+                        stderr_path=stderr_path,
+                        live=self.live_output,
+                        timeout=self.process_timeout,
+                        cwd=cwd,
+                        env={**env, **log_env},
+                    )
+                    span["attributes"]["returncode"] = process.returncode
+            if process.returncode in returncodes:
+                return process.returncode
+            diagnosis = diagnose(stderr_path, log_path)
+            if attempt == retries or not diagnosis.is_retryable():
+                break
+            delay = min(
+                TOFU_RETRY_BACKOFF_BASE * 2**attempt * random.uniform(0.5, 1.5),
+                TOFU_RETRY_BACKOFF_MAX,
+            )
             click.echo(
-                error(
-                    "Terraform init failed "
-                    f"(check {init_stderr_path} and {init_log_path})"
+                warning(
+                    f"Terraform {command} failed, retrying in {delay:.0f}s "
+                    f"({attempt + 1}/{retries})"
                 )
             )
-            raise BootstrapError
+            click.echo(diagnosis.render())
+            await asyncio.sleep(delay)
+        check_paths = " and ".join(map(str, filter(None, (stderr_path, log_path))))
+        click.echo(error(f"Terraform {command} failed (check {check_paths})"))
+        click.echo(diagnosis.render() or "\n".join(process.stderr_tail))
+        raise BootstrapError
 
-    def run_terraform_apply(self, cwd, env, logs_dir):
-        """Run Terraform apply."""
-        apply_log_path = logs_dir / "apply.log"
-        apply_stdout_path = logs_dir / "apply-stdout.log"
-        apply_stderr_path = logs_dir / "apply-stderr.log"
-        apply_process = subprocess.run(
-            ["tofu", "apply", "-auto-approve", "-input=false", "-no-color"],
-            capture_output=True,
-            cwd=cwd,
-            env=dict(**env, TF_LOG_PATH=str(apply_log_path.resolve())),
-            text=True,
-        )
-        apply_stdout_path.write_text(apply_process.stdout)
-        if apply_process.returncode != 0:
-            apply_stderr_path.write_text(apply_process.stderr)
-            click.echo(
-                error(
-                    "Terraform apply failed "
-                    f"(check {apply_stderr_path} and {apply_log_path})"
+    async def run_terraform_init(self, module_name, cwd, env, logs_dir):
+        """Run Terraform init, reusing a cached data dir for the same module.
+
+        The cache is keyed by the module source, which init never changes since
+        it runs in a copy, and keeps the lock file init writes along with the
+        data dir.
+        """
+        module_dir = self.get_terraform_module_dir(module_name)
+        shutil.copytree(module_dir, cwd, dirs_exist_ok=True)
+        data_dir = Path(env["TF_DATA_DIR"])
+        cache_dir = TOFU_INIT_CACHE_DIR / get_tofu_module_hash(
+            module_dir, self.tofu_version
+        )
+        if not cache_dir.is_dir():
+            TOFU_INIT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            # NOTE: initialized aside and renamed, since runs can share the cache
+            tmp_dir = cache_dir.with_name(f"{cache_dir.name}.{secrets.token_hex(4)}")
+            try:
+                await self.run_tofu(
+                    "init",
+                    ["-input=false", "-no-color"],
+                    cwd,
+                    dict(env, TF_DATA_DIR=str(tmp_dir.resolve())),
+                    logs_dir,
                 )
-            )
-            self.reset_terraform()
-            raise BootstrapError
+                (cwd / TOFU_LOCK_FILENAME).is_file() and shutil.copy2(
+                    cwd / TOFU_LOCK_FILENAME, tmp_dir / TOFU_LOCK_FILENAME
+                )
+            except BootstrapError:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+                raise
+            try:
+                tmp_dir.rename(cache_dir)
+            except OSError:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+        shutil.rmtree(data_dir, ignore_errors=True)
+        try:
+            shutil.copytree(cache_dir, data_dir, symlinks=True, copy_function=os.link)
+        except shutil.Error:
+            # NOTE: hard links are not available across filesystems
+            shutil.rmtree(data_dir, ignore_errors=True)
+            shutil.copytree(cache_dir, data_dir, symlinks=True)
+        (data_dir / TOFU_LOCK_FILENAME).is_file() and shutil.copyfile(
+            data_dir / TOFU_LOCK_FILENAME, cwd / TOFU_LOCK_FILENAME
+        )
+
+    async def run_terraform_apply(
+        self, cwd, env, logs_dir, state_path, var_file=None, targets=()
+    ):
+        """Run Terraform apply, limited to the given resources if any."""
+        await self.run_tofu(
+            "apply",
+            [
+                "-auto-approve",
+                "-input=false",
+                "-no-color",
+                f"-state={state_path.resolve()}",
+                *(var_file and [f"-var-file={var_file.resolve()}"] or []),
+                *(f"-target={target}" for target in targets),
+            ],
+            cwd,
+            env,
+            logs_dir,
+            retries=self.tofu_apply_retries,
+            log_name=targets and "apply-targets" or "apply",
+        )
 
-    def run_terraform_destroy(self, cwd, env, logs_dir):
+    async def run_terraform_destroy(
+        self, cwd, env, logs_dir, state_path, var_file=None
+    ):
         """Run Terraform destroy."""
-        destroy_log_path = logs_dir / "destroy.log"
-        destroy_stdout_path = logs_dir / "destroy-stdout.log"
-        destroy_stderr_path = logs_dir / "destroy-stderr.log"
-        destroy_process = subprocess.run(
+        await self.run_tofu(
+            "destroy",
             [
-                "tofu",
-                "destroy",
                 "-auto-approve",
                 "-input=false",
                 "-no-color",
+                f"-state={state_path.resolve()}",
+                *(var_file and [f"-var-file={var_file.resolve()}"] or []),
             ],
-            capture_output=True,
-            cwd=cwd,
-            env=dict(**env, TF_LOG_PATH=str(destroy_log_path.resolve())),
-            text=True,
-        )
-        destroy_stdout_path.write_text(destroy_process.stdout)
-        if destroy_process.returncode != 0:
-            destroy_stderr_path.write_text(destroy_process.stderr)
-            click.echo(
-                error(
-                    "Terraform destroy failed "
-                    f"(check {destroy_stderr_path} and {destroy_log_path})"
-                )
+            cwd,
+            env,
+            logs_dir,
+        )
+
+    async def run_terraform_plan(
+        self, cwd, env, logs_dir, state_path, var_file=None, plan_path=None
+    ):
+        """Run Terraform plan, returning 2 if changes are pending, 0 otherwise."""
+        return await self.run_tofu(
+            "plan",
+            [
+                "-detailed-exitcode",
+                "-input=false",
+                "-lock=false",
+                "-no-color",
+                f"-state={state_path.resolve()}",
+                *(var_file and [f"-var-file={var_file.resolve()}"] or []),
+                *(plan_path and [f"-out={plan_path.resolve()}"] or []),
+            ],
+            cwd,
+            env,
+            logs_dir,
+            returncodes=(0, 2),
+        )
+
+    async def get_terraform_plan_changes(self, cwd, env, logs_dir, plan_path):
+        """Get the count of the given Terraform plan changes by action."""
+        show_stderr_path = logs_dir / "show-stderr.log"
+        with self.tracer.span("tofu show", module=Path(cwd).name):
+            show_process = await acapture_process(
+                ["tofu", "show", "-json", "-no-color", str(plan_path.resolve())],
+                timeout=self.process_timeout,
+                cwd=cwd,
+                env=env,
             )
+        if show_process.returncode != 0:
+            show_stderr_path.write_text(show_process.stderr)
+            click.echo(error(f"Terraform show failed (check {show_stderr_path})"))
             raise BootstrapError
+        return count_tofu_plan_changes(json.loads(show_process.stdout))
 
-    def get_terraform_outputs(self, cwd, env, outputs):
+    async def get_terraform_outputs(self, cwd, env, logs_dir, state_path, outputs):
         """Get Terraform outputs."""
-        return {
-            output_name: subprocess.run(
-                ["tofu", "output", "-raw", output_name],
-                capture_output=True,
+        output_stderr_path = logs_dir / "output-stderr.log"
+        with self.tracer.span("tofu output", module=Path(cwd).name):
+            output_process = await acapture_process(
+                ["tofu", "output", "-json", f"-state={state_path.resolve()}"],
+                timeout=self.process_timeout,
                 cwd=cwd,
                 env=env,
-                text=True,
-            ).stdout
+            )
+        if output_process.returncode != 0:
+            output_stderr_path.write_text(output_process.stderr)
+            click.echo(error(f"Terraform output failed (check {output_stderr_path})"))
+            raise BootstrapError
+        terraform_outputs = {
+            output_name: output["value"]
+            for output_name, output in json.loads(output_process.stdout).items()
+        }
+        if missing_outputs := sorted(set(outputs) - set(terraform_outputs)):
+            click.echo(
+                error(f"Terraform outputs not found: {', '.join(missing_outputs)}")
+            )
+            raise BootstrapError
+        return {output_name: terraform_outputs[output_name] for output_name in outputs}
+
+    def get_terraform_state_path(self, module_name):
+        """Return the given module state path, persisted across the project runs."""
+        return (
+            TOFU_STATES_DIR
+            / self.project_slug
+            / self.service_slug
+            / module_name
+            / "terraform.tfstate"
+        )
+
+    def get_terraform_state_outputs(self, module_name, outputs):
+        """Return the given outputs of the module, as found in its state."""
+        state = json.loads(self.get_terraform_state_path(module_name).read_text())
+        return {
+            output_name: state["outputs"][output_name]["value"]
             for output_name in outputs
         }
 
-    def reset_terraform(self):
-        """Destroy all Terraform modules resources."""
-        for module_name, env in self.terraform_run_modules:
-            click.echo(warning(f"Destroying Terraform {module_name} resources."))
-            cwd, logs_dir, _terraform_dir, env = self.get_terraform_module_params(
-                module_name, env
-            )
-            self.run_terraform_destroy(cwd, env, logs_dir)
+    def has_terraform_resources(self, state_path):
+        """Tell if the given state has managed resources."""
+        try:
+            resources = json.loads(state_path.read_text()).get("resources", [])
+        except FileNotFoundError:
+            resources = []
+        return any(resource.get("mode") == "managed" for resource in resources)
 
-    def run_terraform(self, module_name, env, outputs=None):
-        """Initialize the Terraform controlled resources."""
-        self.terraform_run_modules.append((module_name, env))
+    async def destroy_terraform_module(self, module_name, env):
+        """Destroy the given Terraform module resources, if any."""
         cwd, logs_dir, terraform_dir, env = self.get_terraform_module_params(
             module_name, env
         )
+        state_path = self.get_terraform_state_path(module_name)
+        # NOTE: the next runs must apply the module again, even if unchanged
+        state_path.with_name("fingerprint").unlink(missing_ok=True)
+        if not self.has_terraform_resources(state_path):
+            click.echo(info(f"...no Terraform {module_name} resources to destroy"))
+            return
+        click.echo(warning(f"Destroying Terraform {module_name} resources."))
+        var_file = terraform_dir / TOFU_TFVARS_FILENAME
+        start = perf_counter()
+        with self.tracer.span(f"{module_name} destroy", track=f"{module_name}-destroy"):
+            await self.run_terraform_destroy(
+                cwd, env, logs_dir, state_path, var_file.is_file() and var_file or None
+            )
+        click.echo(
+            info(
+                f"...destroyed the Terraform {module_name} resources "
+                f"in {perf_counter() - start:.1f}s"
+            )
+        )
+
+    async def reset_terraform(self, keep=()):
+        """Destroy all Terraform modules resources, except the given ones.
+
+        Modules are destroyed concurrently, each one after the modules requiring
+        it (e.g. Vault before GitLab).
+        """
+        requirements = get_requirements(self.get_steps())
+        modules = {
+            module_name: env
+            for module_name, env in self.terraform_run_modules
+            if module_name not in keep
+        }
+        await arun_steps(
+            [
+                Step(
+                    name=module_name,
+                    func=partial(self.destroy_terraform_module, module_name, env),
+                    requires=tuple(
+                        other_module_name
+                        for other_module_name in modules
+                        if module_name in requirements.get(other_module_name, ())
+                    ),
+                )
+                for module_name, env in modules.items()
+            ],
+            self.max_workers,
+        )
+
+    def write_terraform_tfvars(self, terraform_dir, tfvars):
+        """Write the given Terraform variables to a file readable by the owner only."""
+        var_file = terraform_dir / TOFU_TFVARS_FILENAME
+        with os.fdopen(
+            os.open(var_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w"
+        ) as f:
+            json.dump(tfvars, f)
+        return var_file
+
+    async def run_terraform(
+        self, module_name, env, outputs=None, before_apply=None, tfvars=None
+    ):
+        """Initialize the Terraform controlled resources.
+
+        Structured variables are passed as a JSON variables file, since they can
+        exceed the environment size limits. The state is kept across the project
+        runs, and the apply is skipped when the module and its variables are
+        unchanged since the last successful one, and its resources still exist.
+        """
+        if self.plan_only:
+            await self.plan_terraform(module_name, env, tfvars)
+            return
+        cwd, logs_dir, terraform_dir, module_env = self.get_terraform_module_params(
+            module_name, env
+        )
+        state_path = self.get_terraform_state_path(module_name)
+        fingerprint_path = state_path.with_name("fingerprint")
+        fingerprint = get_tofu_fingerprint(
+            get_tofu_module_hash(
+                self.get_terraform_module_dir(module_name), self.tofu_version
+            ),
+            {"env": env, "tfvars": tfvars},
+        )
         os.makedirs(terraform_dir, exist_ok=True)
-        os.makedirs(logs_dir)
-        self.run_terraform_init(cwd, env, logs_dir, terraform_dir / "terraform.tfstate")
-        self.run_terraform_apply(cwd, env, logs_dir)
+        os.makedirs(state_path.parent, mode=0o700, exist_ok=True)
+        os.makedirs(logs_dir, exist_ok=True)
+        var_file = tfvars and self.write_terraform_tfvars(terraform_dir, tfvars) or None
+        await self.run_terraform_init(module_name, cwd, module_env, logs_dir)
+        has_resources = self.has_terraform_resources(state_path)
+        # NOTE: only the modules created by this run are destroyed when resetting
+        if not has_resources:
+            self.terraform_run_modules.append((module_name, env))
+            append_journal_entry(
+                self.terraform_dir / JOURNAL_FILENAME,
+                event="module",
+                module=module_name,
+            )
+        if (
+            has_resources
+            and fingerprint_path.is_file()
+            and fingerprint_path.read_text() == fingerprint
+            and not (
+                self.tofu_drift_check
+                and await self.run_terraform_plan(
+                    cwd, module_env, logs_dir, state_path, var_file
+                )
+            )
+        ):
+            click.echo(info(f"...the Terraform {module_name} resources are unchanged"))
+        else:
+            fingerprint_path.unlink(missing_ok=True)
+            before_apply and await before_apply(
+                cwd, module_env, logs_dir, state_path, var_file
+            )
+            await self.run_terraform_apply(
+                cwd, module_env, logs_dir, state_path, var_file
+            )
+            fingerprint_path.write_text(fingerprint)
         outputs and self.terraform_outputs.update(
-            {module_name: self.get_terraform_outputs(cwd, env, outputs)}
+            {
+                module_name: await self.get_terraform_outputs(
+                    cwd, module_env, logs_dir, state_path, outputs
+                )
+            }
         )
 
+    async def plan_terraform(self, module_name, env, tfvars=None):
+        """Plan the Terraform controlled resources changes."""
+        cwd, logs_dir, terraform_dir, module_env = self.get_terraform_module_params(
+            module_name, env
+        )
+        plan_path = terraform_dir / "tfplan"
+        os.makedirs(terraform_dir, exist_ok=True)
+        os.makedirs(logs_dir, exist_ok=True)
+        var_file = tfvars and self.write_terraform_tfvars(terraform_dir, tfvars) or None
+        start = perf_counter()
+        await self.run_terraform_init(module_name, cwd, module_env, logs_dir)
+        init_end = perf_counter()
+        await self.run_terraform_plan(
+            cwd,
+            module_env,
+            logs_dir,
+            self.get_terraform_state_path(module_name),
+            var_file,
+            plan_path,
+        )
+        plan_end = perf_counter()
+        self.terraform_plans[module_name] = {
+            "changes": await self.get_terraform_plan_changes(
+                cwd, module_env, logs_dir, plan_path
+            ),
+            "seconds": {
+                "init": round(init_end - start, 1),
+                "plan": round(plan_end - init_end, 1),
+                "show": round(perf_counter() - plan_end, 1),
+            },
+        }
+
     def make_sed(self, file_path, placeholder, replace_value):
         """Replace a placeholder value with a given one in a given file."""
         target_file = self.output_dir / self.project_dirname / file_path
@@ -657,22 +1176,186 @@ class Runner:
             target_file.read_text().replace(placeholder, replace_value)
         )
 
-    def init_subrepo(self, service_slug, template_url, **kwargs):
-        """Initialize a subrepo using the given template and options."""
-        subrepo_dir = str((SUBREPOS_DIR / service_slug).resolve())
+    async def update_git_mirror(self, url, ref=None):
+        """Create or refresh the local bare mirror of the given repository.
+
+        Existing mirrors are fetched when the pinned revision is missing or when
+        older than the maximum age, unless the pinned revision cannot move (i.e.
+        a commit or a tag). When the fetch fails the cached mirror is used.
+        """
+        mirror_dir = get_git_mirror_dir(url)
+        if not mirror_dir.is_dir():
+            os.makedirs(GIT_MIRRORS_DIR, exist_ok=True)
+            temp_dir = mirror_dir.with_name(f"{mirror_dir.name}-{secrets.token_hex(4)}")
+            with self.tracer.span("git clone --mirror", url=url):
+                clone = await acapture_process(
+                    ["git", "clone", "-q", "--mirror", url, str(temp_dir)],
+                    timeout=self.process_timeout,
+                )
+            if clone.returncode != 0:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+                click.echo(error(f"Failed to mirror {url}"))
+                click.echo(clone.stderr)
+                raise BootstrapError
+            try:
+                temp_dir.rename(mirror_dir)
+            except OSError:
+                # NOTE: another run created the mirror in the meantime
+                shutil.rmtree(temp_dir, ignore_errors=True)
+            return mirror_dir
+        is_stale = time() - mirror_dir.stat().st_mtime > GIT_MIRROR_MAX_AGE
+        if ref:
+            # NOTE: commits and tags cannot move, unlike branches
+            fixed_ref = (
+                re.fullmatch(GIT_COMMIT_SHA_PATTERN, ref) and ref or f"refs/tags/{ref}"
+            )
+            if await self.has_git_revision(mirror_dir, fixed_ref):
+                is_stale = False
+            elif not await self.has_git_revision(mirror_dir, ref):
+                is_stale = True
+        if is_stale:
+            with self.tracer.span("git fetch", url=url):
+                fetch = await acapture_process(
+                    ["git", "fetch", "-q", "--prune"],
+                    timeout=self.process_timeout,
+                    cwd=mirror_dir,
+                )
+            if fetch.returncode == 0:
+                mirror_dir.touch()
+            else:
+                click.echo(warning(f"Failed to fetch {url}, using the cached mirror."))
+        return mirror_dir
+
+    async def has_git_revision(self, repo_dir, ref):
+        """Tell if the given ref resolves to a commit in the given repository."""
+        revision = await acapture_process(
+            ["git", "rev-parse", "-q", "--verify", f"{ref}^{{commit}}"],
+            timeout=self.process_timeout,
+            cwd=repo_dir,
+        )
+        return revision.returncode == 0
+
+    async def get_subrepo_venv(self, service_slug, subrepo_dir):
+        """Return a virtualenv with the subrepo dependencies, reusing a cached one."""
+        requirements_path = subrepo_dir / "requirements" / "common.txt"
+        venv_dir = SUBREPOS_VENVS_DIR / get_requirements_hash(requirements_path)
+        if venv_dir.is_dir():
+            return venv_dir
+        SUBREPOS_VENVS_DIR.mkdir(parents=True, exist_ok=True)
+        # NOTE: created aside and renamed, since runs can share the cache
+        tmp_dir = venv_dir.with_name(f"{venv_dir.name}.{secrets.token_hex(4)}")
+        logs_dir = self.logs_dir / service_slug
+        os.makedirs(logs_dir, exist_ok=True)
+        offline_args = self.bundle and [
+            "--offline",
+            "--no-index",
+            "--find-links",
+            await asyncio.to_thread(open_bundle(self.bundle).extract, "wheels"),
+        ]
+        try:
+            for command, args in (
+                ("venv", ["--relocatable", "--python", sys.executable, tmp_dir]),
+                (
+                    "pip",
+                    [
+                        "install",
+                        "--python",
+                        tmp_dir,
+                        "-r",
+                        requirements_path,
+                        *(offline_args or []),
+                    ],
+                ),
+            ):
+                with self.tracer.span(f"uv {command}", service_slug=service_slug):
+                    deps = await arun_process(
+                        [sys.executable, "-m", "uv", command, "-q", *map(str, args)],
+                        stdout_path=logs_dir / f"uv-{command}-stdout.log",
+                        stderr_path=logs_dir / f"uv-{command}-stderr.log",
+                        live=self.live_output,
+                        timeout=self.process_timeout,
+                        env={**os.environ, "UV_CACHE_DIR": str(UV_CACHE_DIR)},
+                    )
+                if deps.returncode != 0:
+                    click.echo(
+                        error(f"Failed to install {service_slug} subrepo dependencies")
+                    )
+                    click.echo("\n".join(deps.stderr_tail))
+                    raise BootstrapError
+        except (BootstrapError, asyncio.CancelledError):
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        try:
+            tmp_dir.rename(venv_dir)
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        return venv_dir
+
+    async def prefetch_subrepo(self, service_slug, template_url):
+        """Clone the given subrepo template and install its dependencies."""
+        url, ref = split_template_url(template_url)
+        if self.bundle:
+            source = await asyncio.to_thread(
+                open_bundle(self.bundle).extract_template, url
+            )
+        else:
+            source = await self.update_git_mirror(url, ref)
+        subrepo_dir = str((SUBREPOS_DIR / self.run_id / service_slug).resolve())
         shutil.rmtree(subrepo_dir, ignore_errors=True)
-        clone = subprocess.run(
-            [
-                "git",
-                "clone",
-                template_url,
-                subrepo_dir,
-                "-q",
-            ]
-        )
-        if clone.returncode != 0:
-            click.echo(error(f"Failed to clone {service_slug} subrepo from {template_url}"))
-            raise BootstrapError
+        # NOTE: cloning a local mirror or git bundle needs no network access
+        with self.tracer.span("git clone", url=template_url):
+            for git_args in (
+                ["clone", "-q", str(source), subrepo_dir],
+                ["-C", subrepo_dir, "remote", "set-url", "origin", url],
+                *(ref and [["-C", subrepo_dir, "checkout", "-q", ref]] or []),
+            ):
+                if await acall_process(
+                    ["git", *git_args], timeout=self.process_timeout
+                ):
+                    click.echo(
+                        error(
+                            f"Failed to clone {service_slug} subrepo "
+                            f"from {template_url}"
+                        )
+                    )
+                    raise BootstrapError
+        self.subrepo_workers[service_slug] = await self.start_subrepo_worker(
+            service_slug, Path(subrepo_dir)
+        )
+
+    async def start_subrepo_worker(self, service_slug, subrepo_dir):
+        """Start a subrepo worker, which imports the subrepo runner in advance."""
+        venv_dir = await self.get_subrepo_venv(service_slug, subrepo_dir)
+        return await astart_worker(
+            [str(venv_dir / "bin" / "python"), "-P", str(SUBREPO_WORKER_PATH)],
+            prefix=f"[{service_slug}] ",
+            cwd=subrepo_dir,
+            env={
+                **os.environ,
+                **self.get_tofu_env(),
+                "PATH": os.pathsep.join((str(venv_dir / "bin"), os.environ["PATH"])),
+                "VIRTUAL_ENV": str(venv_dir),
+            },
+        )
+
+    async def stop_subrepo_workers(self):
+        """Stop the subrepo workers left unused."""
+        workers = list(self.subrepo_workers.values())
+        self.subrepo_workers.clear()
+        await asyncio.gather(*map(astop_worker, workers))
+
+    async def init_subrepo(self, service_slug, template_url, **kwargs):
+        """Initialize a subrepo using the given template and options.
+
+        The options are sent to a subrepo worker as JSON, rather than on the
+        command line, and its events (e.g. the timings) are kept by subrepo.
+        """
+        subrepo_dir = (SUBREPOS_DIR / self.run_id / service_slug).resolve()
+        # NOTE: the subrepo is usually prefetched while the platform is applied
+        if not subrepo_dir.is_dir():
+            await self.prefetch_subrepo(service_slug, template_url)
+        worker = self.subrepo_workers.pop(service_slug, None)
+        worker = worker or await self.start_subrepo_worker(service_slug, subrepo_dir)
         options = {
             "env_to_cluster": self.env_to_cluster,
             "gid": self.gid,
@@ -703,89 +1386,355 @@ class Runner:
             "terraform_cloud_organization": self.terraform_cloud_organization,
             "terraform_cloud_project_create": False,
             "terraform_cloud_token": self.terraform_cloud_token,
-            "terraform_dir": str(self.terraform_dir.resolve()),
+            # NOTE: concurrent subrepos must not clean up each other files
+            "terraform_dir": str(self.terraform_dir / service_slug),
             "uid": self.uid,
             "use_valkey": self.use_valkey,
             "vault_url": self.vault_url,
             "vault_token": self.vault_token,
             **kwargs,
         }
-        deps = subprocess.run(
-            ["python", "-m", "pip", "install", "-r", "requirements/common.txt"],
-            capture_output=True,
-            cwd=subrepo_dir,
-        )
-        if deps.returncode != 0:
-            click.echo(error(f"Failed to install {service_slug} subrepo dependencies"))
-            click.echo(deps.stderr.decode("utf-8", "replace"))
-            raise BootstrapError
-        runner = subprocess.run(
-            [
-                "python",
-                "-c",
-                f"from bootstrap.runner import Runner; Runner(**{options}).run()",
-            ],
-            cwd=subrepo_dir,
-        )
-        if runner.returncode != 0:
+        with self.tracer.span("subrepo", service_slug=service_slug):
+            runner_returncode = await arun_worker(
+                worker, options, timeout=self.process_timeout
+            )
+            # NOTE: the nested runner spans are sent along with its last event
+            for event in worker.events:
+                event.get("trace") and self.tracer.merge(event["trace"])
+        self.subrepo_events[service_slug] = worker.events
+        if runner_returncode != 0:
             click.echo(error(f"Subrepo {service_slug} bootstrap failed"))
             raise BootstrapError
+        completed = next((e for e in worker.events if e["event"] == "completed"), None)
+        completed and click.echo(
+            info(
+                f"...bootstrapped the {service_slug} subrepo "
+                f"in {completed['seconds']:.1f}s"
+            )
+        )
 
-    def change_output_owner(self):
+    async def change_output_owner(self):
         """Change the owner of the output directory recursively."""
         if self.uid:
-            subprocess.run(
-                [
-                    "chown",
-                    "-R",
-                    ":".join(map(str, filter(None, (self.uid, self.gid)))),
-                    self.service_dir,
-                ]
-            )
+            with self.tracer.span("chown"):
+                await acall_process(
+                    [
+                        "chown",
+                        "-R",
+                        ":".join(map(str, filter(None, (self.uid, self.gid)))),
+                        self.service_dir,
+                    ],
+                    timeout=self.process_timeout,
+                )
 
     def cleanup(self):
-        """Clean up after a successful execution."""
-        shutil.rmtree(DUMPS_DIR, ignore_errors=True)
-        shutil.rmtree(SUBREPOS_DIR, ignore_errors=True)
-        shutil.rmtree(self.terraform_dir, ignore_errors=True)
+        """Clean up after a successful execution, deleting in the background."""
+        with self.tracer.span("cleanup"):
+            move_to_trash(SUBREPOS_DIR / self.run_id)
+            move_to_trash(self.terraform_dir)
+            empty_trash()
 
-    def run(self):
-        """Run the bootstrap."""
-        click.echo(highlight(f"Initializing the {self.service_slug} service:"))
-        self.set_envs()
-        self.collect_gitlab_variables()
-        self.init_service()
-        self.create_env_file()
-        if self.terraform_backend == TERRAFORM_BACKEND_TFC:
-            self.init_terraform_cloud()
-        if self.gitlab_group_slug:
-            self.init_gitlab()
-        if self.vault_url:
-            self.init_vault()
+    def get_steps(self):
+        """Return the bootstrap steps along with their requirements."""
         frontend_template_url = FRONTEND_TEMPLATE_URLS.get(self.frontend_type)
         backend_template_url = BACKEND_TEMPLATE_URLS.get(self.backend_type)
-        try:
-            if frontend_template_url:
-                self.init_subrepo(
+        # NOTE: subrepos create their resources inside the platform ones
+        subrepo_requires = ("service", "terraform-cloud", "gitlab", "vault")
+        steps = [
+            Step(name="service", func=self.init_service),
+            Step(name="env-file", func=self.create_env_file, requires=("service",)),
+        ]
+        self.terraform_backend == TERRAFORM_BACKEND_TFC and steps.append(
+            Step(name="terraform-cloud", func=self.init_terraform_cloud)
+        )
+        self.gitlab_group_slug and steps.append(
+            Step(name="gitlab", func=self.init_gitlab, requires=("service",))
+        )
+        # NOTE: Vault secrets include the GitLab registry credentials
+        self.vault_url and steps.append(
+            Step(name="vault", func=self.init_vault, requires=("gitlab",))
+        )
+        # NOTE: templates only depend on the options, so they are prefetched early
+        for name, service_slug, template_url in (
+            ("frontend", self.frontend_service_slug, frontend_template_url),
+            ("backend", self.backend_service_slug, backend_template_url),
+        ):
+            template_url and steps.append(
+                Step(
+                    name=f"{name}-prefetch",
+                    func=partial(self.prefetch_subrepo, service_slug, template_url),
+                    cancellable=True,
+                )
+            )
+        frontend_template_url and steps.append(
+            Step(
+                name="frontend",
+                func=partial(
+                    self.init_subrepo,
                     self.frontend_service_slug,
                     frontend_template_url,
                     internal_backend_url=self.backend_service_slug
-                    and (f"http://{self.backend_service_slug}:{self.backend_service_port}")
+                    and (
+                        f"http://{self.backend_service_slug}:{self.backend_service_port}"
+                    )
                     or None,
                     internal_service_port=self.frontend_service_port,
                     sentry_dsn=self.frontend_sentry_dsn,
-                )
-            if backend_template_url:
-                self.init_subrepo(
+                ),
+                requires=(*subrepo_requires, "frontend-prefetch"),
+                cancellable=True,
+            )
+        )
+        backend_template_url and steps.append(
+            Step(
+                name="backend",
+                func=partial(
+                    self.init_subrepo,
                     self.backend_service_slug,
                     backend_template_url,
                     internal_service_port=self.backend_service_port,
                     media_storage=self.media_storage,
                     python_version=self.python_version,
                     sentry_dsn=self.backend_sentry_dsn,
+                ),
+                requires=(*subrepo_requires, "backend-prefetch"),
+                cancellable=True,
+            )
+        )
+        return steps
+
+    def prune_logs(self):
+        """Remove the oldest runs logs exceeding the logs retention."""
+        if (
+            not self.logs_retention
+            or not self.runs_logs_dir
+            or not self.runs_logs_dir.is_dir()
+        ):
+            return
+        runs_logs_dirs = sorted(
+            (
+                path
+                for path in self.runs_logs_dir.iterdir()
+                if path.is_dir()
+                and path != self.logs_dir
+                and re.fullmatch(RUN_ID_PATTERN, path.name)
+            ),
+            key=lambda path: path.stat().st_mtime,
+        )
+        prune_count = max(len(runs_logs_dirs) - self.logs_retention + 1, 0)
+        for path in runs_logs_dirs[:prune_count]:
+            move_to_trash(path)
+
+    def get_inputs_hash(self):
+        """Return a hash of the options affecting the created resources."""
+        options = {
+            option.name: getattr(self, option.name)
+            for option in fields(self)
+            if option.init and option.name not in RUNNER_EXECUTION_OPTIONS
+        }
+        return hashlib.sha256(
+            json.dumps(options, cls=CollectorJSONEncoder, sort_keys=True).encode()
+        ).hexdigest()
+
+    def resume(self, inputs_hash):
+        """Restore the completed steps and their outputs from the run journal."""
+        journal = read_journal(self.terraform_dir / JOURNAL_FILENAME)
+        for entry in journal:
+            if entry["event"] == "module":
+                self.terraform_run_modules.append(
+                    (entry["module"], self.get_module_env(entry["module"]))
                 )
-        except BootstrapError:
-            self.reset_terraform()
-            raise
-        self.change_output_owner()
+            elif entry["event"] == "step" and entry["inputs"] == inputs_hash:
+                # NOTE: outputs (e.g. the registry password) are read from the state
+                try:
+                    entry["outputs"] and self.terraform_outputs.update(
+                        {
+                            entry["step"]: self.get_terraform_state_outputs(
+                                entry["step"], entry["outputs"]
+                            )
+                        }
+                    )
+                except (KeyError, OSError, ValueError):
+                    continue
+                self.completed_steps.add(entry["step"])
+        if any(
+            entry["event"] == "step" and entry["inputs"] != inputs_hash
+            for entry in journal
+        ):
+            click.echo(warning("The options changed, all steps will be run again."))
+        self.completed_steps and click.echo(
+            info(f"...skipping the completed steps: {sorted(self.completed_steps)}")
+        )
+
+    async def run_traced_step(self, step):
+        """Run the given step traced on its own track, since steps run concurrently."""
+        with self.tracer.span(step.name, track=step.name):
+            await acall(step.func)
+
+    async def run_journaled_step(self, step, inputs_hash):
+        """Run the given step and record its completion in the run journal."""
+        await self.run_traced_step(step)
+        self.completed_steps.add(step.name)
+        append_journal_entry(
+            self.terraform_dir / JOURNAL_FILENAME,
+            event="step",
+            step=step.name,
+            inputs=inputs_hash,
+            outputs=sorted(self.terraform_outputs.get(step.name, {})) or None,
+            vault_secrets=step.name == "vault" and sorted(self.vault_secrets) or None,
+        )
+
+    async def plan(self):
+        """Plan all the Terraform modules at the same time, and summarize them."""
+        click.echo(highlight(f"Planning the {self.service_slug} service:"))
+        self.prune_logs()
+        self.set_envs()
+        self.collect_gitlab_variables()
+        # NOTE: the GitLab outputs used by Vault are only known after apply
+        self.terraform_outputs["gitlab"] = {
+            "registry_password": TOFU_PLAN_PLACEHOLDER,
+            "registry_username": TOFU_PLAN_PLACEHOLDER,
+        }
+        start = perf_counter()
+        await arun_steps(
+            [
+                Step(
+                    name=step.name,
+                    func=partial(self.run_traced_step, step),
+                    requires=tuple(i for i in step.requires if i == "service"),
+                )
+                for step in self.get_steps()
+                if step.name in ("service", "terraform-cloud", "gitlab", "vault")
+            ],
+            self.max_workers,
+        )
+        summary_path = self.logs_dir / "plan.json"
+        os.makedirs(self.logs_dir, exist_ok=True)
+        summary_path.write_text(
+            json.dumps(
+                {
+                    "run_id": self.run_id,
+                    "modules": self.terraform_plans,
+                    "seconds": round(perf_counter() - start, 1),
+                },
+                cls=CollectorJSONEncoder,
+                indent=2,
+            )
+        )
+        for module_name, module_plan in self.terraform_plans.items():
+            click.echo(
+                f"{module_name}: "
+                + ", ".join(f"{v} to {k}" for k, v in module_plan["changes"].items())
+            )
+        click.echo(info(f"...plan summary written to {summary_path}"))
+        # NOTE: the plan files and variables hold secrets, so only the summary is kept
         self.cleanup()
+
+    def write_usage(self):
+        """Write the processes resource usage, and show it summed by phase."""
+        phases = {}
+        for usage in self.process_usages:
+            phases.setdefault(usage["phase"], []).append(usage)
+        summary = sorted(
+            ((phase, sum_usage(usages)) for phase, usages in phases.items()),
+            key=lambda item: item[1]["user_seconds"] + item[1]["system_seconds"],
+            reverse=True,
+        )
+        # NOTE: in-process phases (e.g. cookiecutter) are only in the runner usage
+        runner_usage = asdict(
+            ProcessUsage.from_rusage(resource.getrusage(resource.RUSAGE_SELF))
+        )
+        usage_path = self.logs_dir / USAGE_FILENAME
+        write_json(
+            usage_path,
+            {
+                "run_id": self.run_id,
+                "runner": runner_usage,
+                "phases": dict(summary),
+                "processes": self.process_usages,
+            },
+        )
+        click.echo(highlight("Processes resource usage:"))
+        click.echo(
+            f"{'phase':<24}{'processes':>10}{'user s':>10}{'system s':>10}"
+            f"{'max RSS MB':>12}{'blocks in':>11}{'blocks out':>11}"
+        )
+        for phase, usage in (*summary, ("runner", {"processes": 1, **runner_usage})):
+            click.echo(
+                f"{phase:<24}{usage['processes']:>10}{usage['user_seconds']:>10.1f}"
+                f"{usage['system_seconds']:>10.1f}{usage['max_rss_kb'] / 1024:>12.1f}"
+                f"{usage['block_reads']:>11}{usage['block_writes']:>11}"
+            )
+        click.echo(info(f"...resource usage written to {usage_path}"))
+
+    @contextmanager
+    def trace_run(self):
+        """Trace the whole run and its processes usage, written even if it fails."""
+        token = process_usages.set(self.process_usages)
+        try:
+            with self.tracer.span("run", run_id=self.run_id):
+                yield
+        finally:
+            process_usages.reset(token)
+            trace_path = self.logs_dir / TRACE_FILENAME
+            self.tracer.write(
+                trace_path, self.trace_otlp and self.logs_dir / TRACE_OTLP_FILENAME
+            )
+            click.echo(info(f"...trace written to {trace_path}"))
+            self.write_usage()
+
+    def run(self):
+        """Run the bootstrap."""
+        asyncio.run(self.arun())
+
+    async def arun(self):
+        """Run the bootstrap asynchronously.
+
+        When a step fails or the run is cancelled, the running processes are
+        terminated and only the resources of the incomplete steps are destroyed,
+        so that the run can be resumed from the failed steps.
+        """
+        with self.trace_run():
+            # NOTE: deletes the trash left by interrupted cleanups
+            empty_trash()
+            # NOTE: the providers are needed by all modules, so they are extracted first
+            self.bundle and await asyncio.to_thread(
+                open_bundle(self.bundle).extract, "providers"
+            )
+            await self.fetch_tofu_version()
+            if self.plan_only:
+                await self.plan()
+                return
+            click.echo(highlight(f"Initializing the {self.service_slug} service:"))
+            self.prune_logs()
+            self.set_envs()
+            self.collect_gitlab_variables()
+            os.makedirs(self.terraform_dir, exist_ok=True)
+            inputs_hash = self.get_inputs_hash()
+            self.resume_run_id and self.resume(inputs_hash)
+            try:
+                await arun_steps(
+                    [
+                        Step(
+                            name=step.name,
+                            func=partial(self.run_journaled_step, step, inputs_hash),
+                            requires=step.requires,
+                            cancellable=step.cancellable,
+                        )
+                        for step in self.get_steps()
+                        if step.name not in self.completed_steps
+                    ],
+                    self.max_workers,
+                )
+            except (Exception, asyncio.CancelledError):
+                await self.stop_subrepo_workers()
+                await self.reset_terraform(keep=self.completed_steps)
+                self.completed_steps and click.echo(
+                    warning(
+                        f"The completed steps resources were kept, run again with "
+                        f"'--resume {self.run_id}' to resume the bootstrap."
+                    )
+                )
+                raise
+            await self.change_output_owner()
+            self.cleanup()
@@ -0,0 +1,99 @@
+"""Run the bootstrap steps following their dependencies."""
+
+import asyncio
+import inspect
+from asyncio import FIRST_COMPLETED
+from dataclasses import dataclass
+from functools import partial
+from typing import Callable
+
+import click
+
+from bootstrap.exceptions import BootstrapError
+
+error = partial(click.style, fg="red")
+
+
+@dataclass(kw_only=True)
+class Step:
+    """A bootstrap step."""
+
+    name: str
+    func: Callable
+    requires: tuple[str, ...] = ()
+    cancellable: bool = False
+
+
+async def acall(func):
+    """Await the given function, run in a thread if it is not a coroutine one."""
+    if inspect.iscoroutinefunction(func):
+        return await func()
+    return await asyncio.to_thread(func)
+
+
+def start_steps(pending, requirements, completed, running, max_workers):
+    """Start the pending steps with completed requirements, up to the given number."""
+    for name, step in list(pending.items()):
+        if len(running) < max_workers and requirements[name] <= completed:
+            running[asyncio.ensure_future(acall(step.func))] = pending.pop(name)
+
+
+def cancel_steps(running):
+    """Cancel the running cancellable steps."""
+    for task, step in running.items():
+        step.cancellable and task.cancel()
+
+
+async def arun_steps(steps, max_workers):
+    """Run the given steps, up to the given number at once, after their requirements.
+
+    Requirements not matching any of the given steps are considered satisfied,
+    so that optional steps can be left out of the graph. When a step fails no
+    further step is started, the running cancellable ones are cancelled, the
+    others are awaited, and the first failure is raised. When cancelled, the
+    running steps are cancelled too.
+    """
+    names = {step.name for step in steps}
+    pending = {step.name: step for step in steps}
+    requirements = {step.name: set(step.requires) & names for step in steps}
+    completed = set()
+    running = {}
+    failure = None
+    while running or (pending and failure is None):
+        if failure is None:
+            start_steps(pending, requirements, completed, running, max_workers)
+            if not running:
+                click.echo(error(f"Unsatisfiable step requirements: {sorted(pending)}"))
+                raise BootstrapError
+        try:
+            done, _pending = await asyncio.wait(running, return_when=FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            [task.cancel() for task in running]
+            await asyncio.gather(*running, return_exceptions=True)
+            raise
+        for task in done:
+            step = running.pop(task)
+            if task.cancelled():
+                continue
+            if task.exception() is None:
+                completed.add(step.name)
+            elif failure is None:
+                failure = task.exception()
+                cancel_steps(running)
+    if failure:
+        raise failure
+
+
+def get_requirements(steps):
+    """Return the direct and indirect requirements of each of the given steps."""
+    direct_requirements = {step.name: step.requires for step in steps}
+    requirements = {}
+
+    def collect(name):
+        if name not in requirements:
+            requirements[name] = set()
+            for required_name in direct_requirements.get(name, ()):
+                requirements[name] |= {required_name, *collect(required_name)}
+        return requirements[name]
+
+    return {step.name: collect(step.name) for step in steps}
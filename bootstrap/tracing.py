@@ -0,0 +1,159 @@
+"""Trace the bootstrap phases, exported as Chrome trace or OTLP JSON."""
+
+import os
+import secrets
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from time import perf_counter_ns, time_ns
+
+from bootstrap.helpers import write_json
+
+current_span = ContextVar("current_span", default=None)
+
+
+def get_otlp_value(value):
+    """Return the given attribute value in the OTLP JSON format."""
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+@dataclass(kw_only=True)
+class Tracer:
+    """The timed spans of a run, each one nested in the span it was started in."""
+
+    track: str
+    trace_id: str = field(default_factory=lambda: secrets.token_hex(16))
+    spans: list = field(default_factory=list)
+
+    @contextmanager
+    def span(self, name, track=None, **attributes):
+        """Record the time spent in the block, yielding the span to annotate it.
+
+        Spans started on their own track (e.g. the concurrent steps) are shown
+        side by side, the others on the track of their parent span.
+        """
+        parent = current_span.get()
+        span = {
+            "name": name,
+            "span_id": secrets.token_hex(8),
+            "parent_id": parent and parent["span_id"],
+            "track": track or parent and parent["track"] or self.track,
+            "start": time_ns(),
+            "attributes": attributes,
+        }
+        token = current_span.set(span)
+        start = perf_counter_ns()
+        try:
+            yield span
+        except BaseException as e:
+            span["error"] = repr(e)
+            raise
+        finally:
+            span["duration"] = perf_counter_ns() - start
+            current_span.reset(token)
+            self.spans.append(span)
+
+    def merge(self, spans):
+        """Add the given spans of a nested run, under the current span.
+
+        The nested root track is merged into the current one, the other nested
+        tracks are prefixed by it.
+        """
+        parent = current_span.get()
+        track = parent and parent["track"] or self.track
+        root_tracks = {span["track"] for span in spans if not span["parent_id"]}
+        self.spans.extend(
+            {
+                **span,
+                "parent_id": span["parent_id"] or parent and parent["span_id"],
+                "track": span["track"] in root_tracks
+                and track
+                or f"{track}/{span['track']}",
+            }
+            for span in spans
+        )
+
+    def get_chrome_trace(self):
+        """Return the spans as a Chrome trace, viewable with Perfetto."""
+        pid = os.getpid()
+        tracks = {}
+        events = [
+            {
+                "name": span["name"],
+                "cat": "bootstrap",
+                "ph": "X",
+                "ts": span["start"] / 1000,
+                "dur": span["duration"] / 1000,
+                "pid": pid,
+                "tid": tracks.setdefault(span["track"], len(tracks) + 1),
+                "args": {
+                    **span["attributes"],
+                    **("error" in span and {"error": span["error"]} or {}),
+                },
+            }
+            for span in sorted(self.spans, key=lambda span: span["start"])
+        ]
+        return {
+            "displayTimeUnit": "ms",
+            "traceEvents": [
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": pid,
+                    "tid": tid,
+                    "args": {"name": track},
+                }
+                for track, tid in tracks.items()
+            ]
+            + events,
+        }
+
+    def get_otlp_trace(self):
+        """Return the spans in the OpenTelemetry protocol JSON format."""
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {"key": "service.name", "value": get_otlp_value("talos")}
+                        ]
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "bootstrap"},
+                            "spans": [self.get_otlp_span(span) for span in self.spans],
+                        }
+                    ],
+                }
+            ]
+        }
+
+    def get_otlp_span(self, span):
+        """Return the given span in the OpenTelemetry protocol JSON format."""
+        return {
+            "traceId": self.trace_id,
+            "spanId": span["span_id"],
+            **(span["parent_id"] and {"parentSpanId": span["parent_id"]} or {}),
+            "name": span["name"],
+            "kind": 1,
+            "startTimeUnixNano": str(span["start"]),
+            "endTimeUnixNano": str(span["start"] + span["duration"]),
+            "attributes": [
+                {"key": key, "value": get_otlp_value(value)}
+                for key, value in {"track": span["track"], **span["attributes"]}.items()
+            ],
+            "status": "error" in span
+            and {"code": 2, "message": span["error"]}
+            or {"code": 1},
+        }
+
+    def write(self, trace_path, otlp_trace_path=None):
+        """Write the Chrome trace, and the OTLP one if a path is given."""
+        write_json(trace_path, self.get_chrome_trace())
+        otlp_trace_path and write_json(otlp_trace_path, self.get_otlp_trace())
@@ -0,0 +1,57 @@
+"""Run a subrepo bootstrap, exchanging its options and events as JSON.
+
+The worker runs inside the subrepo virtualenv and directory, so it only uses the
+standard library. It imports the subrepo runner right away, then waits for the
+options on the standard input, and writes its events as JSON lines to the file
+descriptor given as argument.
+"""
+
+import json
+import os
+import sys
+from time import perf_counter
+
+
+def send_event(events_file, event, **data):
+    """Write the given event as a JSON line."""
+    events_file.write(json.dumps({"event": event, **data}, default=str) + "\n")
+    events_file.flush()
+
+
+def main(events_fd):
+    """Run the subrepo bootstrap with the options read from the standard input."""
+    with os.fdopen(events_fd, "w") as events_file:
+        start = perf_counter()
+        sys.path.insert(0, os.getcwd())
+        from bootstrap.runner import Runner
+
+        send_event(events_file, "ready", seconds=round(perf_counter() - start, 3))
+        if not (options := sys.stdin.read()):
+            # NOTE: the parent run stopped before using the worker
+            return 0
+        start = perf_counter()
+        runner = Runner(**json.loads(options))
+        # NOTE: runners recording their phases send them to be traced by the parent
+        tracer = getattr(runner, "tracer", None)
+        try:
+            runner.run()
+        except BaseException as e:
+            send_event(
+                events_file,
+                "failed",
+                error=repr(e),
+                trace=getattr(tracer, "spans", None),
+            )
+            raise
+        send_event(
+            events_file,
+            "completed",
+            seconds=round(perf_counter() - start, 3),
+            outputs=getattr(runner, "terraform_outputs", None),
+            trace=getattr(tracer, "spans", None),
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1])))
@@ -8,8 +8,14 @@ import click
 
 from bootstrap.collector import Collector
 from bootstrap.constants import (
+    BOOTSTRAP_MAX_WORKERS_DEFAULT,
     GITLAB_TOKEN_ENV_VAR,
+    LOG_COMPRESSION_CHOICES,
+    LOG_COMPRESSION_NONE,
     MEDIA_STORAGE_CHOICES,
+    TOFU_APPLY_RETRIES_DEFAULT,
+    TOFU_LOG_LEVEL_CHOICES,
+    TOFU_LOG_LEVEL_DEFAULT,
     VAULT_TOKEN_ENV_VAR,
 )
 from bootstrap.exceptions import BootstrapError
@@ -105,6 +111,26 @@ from bootstrap.helpers import dump_options, load_options, slugify_option
 @click.option("--gitlab-group-developers")
 @click.option("--terraform-dir", type=click.Path())
 @click.option("--logs-dir", type=click.Path())
+@click.option("--max-workers", default=BOOTSTRAP_MAX_WORKERS_DEFAULT, type=int)
+@click.option("--live-output", is_flag=True)
+@click.option(
+    "--tofu-log-level",
+    default=TOFU_LOG_LEVEL_DEFAULT,
+    type=click.Choice(TOFU_LOG_LEVEL_CHOICES, case_sensitive=False),
+)
+@click.option(
+    "--tofu-log-compression",
+    default=LOG_COMPRESSION_NONE,
+    type=click.Choice(LOG_COMPRESSION_CHOICES, case_sensitive=False),
+)
+@click.option("--logs-retention", type=int)
+@click.option("--tofu-apply-retries", default=TOFU_APPLY_RETRIES_DEFAULT, type=int)
+@click.option("--tofu-drift-check", is_flag=True)
+@click.option("--process-timeout", type=int)
+@click.option("--plan-only", is_flag=True)
+@click.option("--resume", "resume_run_id")
+@click.option("--bundle", type=click.Path(exists=True, dir_okay=False))
+@click.option("--trace-otlp", is_flag=True)
 @click.option("--quiet", is_flag=True)
 def main(**options):
     """Run the setup."""
@@ -112,8 +138,10 @@ def main(**options):
     try:
         collector = Collector(**options)
         collector.collect()
-        dump_options(asdict(collector))
+        dump_path = dump_options(asdict(collector))
         collector.launch_runner()
+        # NOTE: the dump is kept for the actual run after a plan only one
+        dump_path and not collector.plan_only and dump_path.unlink(missing_ok=True)
     except BootstrapError as e:
         raise click.Abort() from e
 
@@ -0,0 +1,95 @@
+"""Bootstrap bundle tests."""
+import json
+import zipfile
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase, mock
+
+from bootstrap.bundle import Bundle, write_bundle
+from bootstrap.constants import BUNDLE_MANIFEST_NAME
+from bootstrap.exceptions import BootstrapError
+
+
+class BundleTestCase(TestCase):
+    """Test the bundles."""
+
+    def setUp(self):
+        """Write a bundle in a temporary directory."""
+        temp_dir = TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.temp_dir = Path(temp_dir.name)
+        build_dir = self.temp_dir / "build"
+        (build_dir / "providers" / "registry").mkdir(parents=True)
+        (build_dir / "providers" / "registry" / "index.json").write_text("{}")
+        (build_dir / "templates").mkdir()
+        (build_dir / "templates" / "backend.bundle").write_bytes(b"git bundle")
+        self.bundle_path = self.temp_dir / "bundle.zip"
+        write_bundle(
+            build_dir,
+            self.bundle_path,
+            {"https://git.example.com/backend": {"path": "templates/backend.bundle"}},
+            python="cpython-311",
+        )
+        cache_patch = mock.patch(
+            "bootstrap.bundle.BUNDLES_CACHE_DIR", self.temp_dir / "cache"
+        )
+        cache_patch.start()
+        self.addCleanup(cache_patch.stop)
+
+    def rewrite_bundle(self, manifest=None, **files):
+        """Rewrite the bundle with the given manifest changes and file contents."""
+        with zipfile.ZipFile(self.bundle_path) as archive:
+            contents = {name: archive.read(name) for name in archive.namelist()}
+        contents[BUNDLE_MANIFEST_NAME] = json.dumps(
+            {**json.loads(contents[BUNDLE_MANIFEST_NAME]), **(manifest or {})}
+        )
+        contents.update(files)
+        with zipfile.ZipFile(self.bundle_path, "w") as archive:
+            for name, content in contents.items():
+                archive.writestr(name, content)
+
+    def test_extract(self):
+        """Test extracting a directory and a template from a bundle."""
+        with redirect_stdout(StringIO()):
+            bundle = Bundle(path=self.bundle_path)
+        self.assertEqual(bundle.manifest["python"], "cpython-311")
+        providers_dir = bundle.extract("providers")
+        self.assertEqual((providers_dir / "registry" / "index.json").read_text(), "{}")
+        self.assertEqual(bundle.extract("providers"), providers_dir)
+        self.assertEqual(
+            bundle.extract_template("https://git.example.com/backend").read_bytes(),
+            b"git bundle",
+        )
+
+    def test_extract_corrupted(self):
+        """Test extracting a file not matching its manifest hash."""
+        self.rewrite_bundle(**{"templates/backend.bundle": b"tampered"})
+        with redirect_stdout(StringIO()) as output:
+            bundle = Bundle(path=self.bundle_path)
+            with self.assertRaises(BootstrapError):
+                bundle.extract("templates")
+        self.assertIn("Corrupted 'templates/backend.bundle'", output.getvalue())
+        self.assertEqual(list((self.temp_dir / "cache").rglob("*.bundle")), [])
+
+    def test_missing_template(self):
+        """Test extracting a template not in the bundle."""
+        with redirect_stdout(StringIO()):
+            bundle = Bundle(path=self.bundle_path)
+            with self.assertRaises(BootstrapError):
+                bundle.extract_template("https://git.example.com/frontend")
+
+    def test_unsupported_version(self):
+        """Test opening a bundle with an unsupported version."""
+        self.rewrite_bundle({"version": 0})
+        with redirect_stdout(StringIO()) as output, self.assertRaises(BootstrapError):
+            Bundle(path=self.bundle_path)
+        self.assertIn("Unsupported bundle", output.getvalue())
+
+    def test_invalid(self):
+        """Test opening a file which is not a bundle."""
+        self.bundle_path.write_text("not a bundle")
+        with redirect_stdout(StringIO()) as output, self.assertRaises(BootstrapError):
+            Bundle(path=self.bundle_path)
+        self.assertIn("Invalid bundle", output.getvalue())
@@ -0,0 +1,116 @@
+"""Bootstrap diagnostics tests."""
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from unittest import TestCase
+
+from bootstrap.diagnostics import Diagnosis, diagnose
+
+APPLY_STDERR = """
+Error: Error creating workspace p_platform_main_kubernetes for organization o
+
+  with tfe_workspace.main["p_platform_main_kubernetes"],
+  on main.tf line 86, in resource "tfe_workspace" "main":
+  86: resource "tfe_workspace" "main" {
+
+invalid attribute
+
+Error: Another error
+
+  with tfe_workspace.main["p_platform_dev_kubernetes"],
+"""
+
+
+class DiagnoseTestCase(TestCase):
+    """Test the 'diagnose' function."""
+
+    def test_diagnose(self):
+        """Test the first error, its resource and the last HTTP status are found."""
+        with TemporaryDirectory() as logs_dir:
+            stderr_path = Path(logs_dir) / "apply-stderr.log"
+            stderr_path.write_text(APPLY_STDERR)
+            log_path = Path(logs_dir) / "apply.log"
+            log_path.write_text(
+                "[DEBUG] provider: HTTP/1.1 404 Not Found\n"
+                "[DEBUG] provider: HTTP/1.1 200 OK\n"
+                '[ERROR] provider: request failed: status_code="422"\n'
+                "[INFO] provider: stopping\n"
+            )
+            diagnosis = diagnose(stderr_path, log_path)
+        self.assertTrue(diagnosis.error.startswith("Error: Error creating workspace"))
+        self.assertTrue(diagnosis.error.endswith("invalid attribute"))
+        self.assertEqual(
+            diagnosis.resource_address,
+            'tfe_workspace.main["p_platform_main_kubernetes"]',
+        )
+        self.assertEqual(diagnosis.http_status, 422)
+
+    def test_missing_files(self):
+        """Test missing or empty files result in an empty diagnosis."""
+        with TemporaryDirectory() as logs_dir:
+            stderr_path = Path(logs_dir) / "apply-stderr.log"
+            stderr_path.touch()
+            diagnosis = diagnose(stderr_path, Path(logs_dir) / "apply.log")
+        self.assertEqual(diagnosis, Diagnosis())
+        self.assertEqual(diagnosis.render(), "")
+
+    def test_stderr_http_status(self):
+        """Test the HTTP status is found in the error, without a TF_LOG."""
+        for stderr, http_status in (
+            (
+                "Error: POST https://gitlab.com/api/v4/groups: 429 "
+                "{message: Too many requests}",
+                429,
+            ),
+            ("Error: error writing secret: Code: 503. Errors:", 503),
+            ("Error: unexpected response: HTTP/1.1 502 Bad Gateway", 502),
+            ("Error: Invalid reference", None),
+        ):
+            with self.subTest(stderr=stderr), TemporaryDirectory() as logs_dir:
+                stderr_path = Path(logs_dir) / "apply-stderr.log"
+                stderr_path.write_text(f"\n{stderr}\n")
+                diagnosis = diagnose(stderr_path, Path(logs_dir) / "apply.log.gz")
+                self.assertEqual(diagnosis.http_status, http_status)
+
+    def test_compressed_log(self):
+        """Test compressed logs are not scanned."""
+        with TemporaryDirectory() as logs_dir:
+            log_path = Path(logs_dir) / "apply.log.gz"
+            log_path.write_text("HTTP/1.1 500 Internal Server Error")
+            diagnosis = diagnose(Path(logs_dir) / "apply-stderr.log", log_path)
+        self.assertIsNone(diagnosis.http_status)
+
+    def test_large_log(self):
+        """Test only the tail of large logs is scanned."""
+        with TemporaryDirectory() as logs_dir:
+            log_path = Path(logs_dir) / "apply.log"
+            with log_path.open("wb") as log_file:
+                log_file.write(b"HTTP/1.1 401 Unauthorized\n")
+                log_file.seek(2 * 1024**3)
+                log_file.write(b"\nHTTP/2.0 503 Service Unavailable\n")
+            start = perf_counter()
+            diagnosis = diagnose(Path(logs_dir) / "apply-stderr.log", log_path)
+            elapsed = perf_counter() - start
+        self.assertEqual(diagnosis.http_status, 503)
+        self.assertLess(elapsed, 1)
+
+    def test_retryable(self):
+        """Test transient failures are told apart from the other ones."""
+        self.assertTrue(Diagnosis(http_status=429).is_retryable())
+        self.assertTrue(Diagnosis(http_status=503).is_retryable())
+        self.assertTrue(
+            Diagnosis(error="Error: Error acquiring the state lock").is_retryable()
+        )
+        self.assertFalse(Diagnosis(http_status=401).is_retryable())
+        self.assertFalse(Diagnosis(error="Error: Invalid reference").is_retryable())
+        self.assertFalse(Diagnosis().is_retryable())
+
+    def test_render(self):
+        """Test rendering a diagnosis."""
+        self.assertEqual(
+            Diagnosis(
+                error="Error: failure", resource_address="a.b", http_status=429
+            ).render(),
+            "Error: failure\nResource: a.b\nHTTP status: 429",
+        )
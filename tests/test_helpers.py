@@ -2,7 +2,8 @@
 import json
 import os
 from pathlib import Path
-from time import time
+from tempfile import TemporaryDirectory
+from time import sleep, time
 from unittest import TestCase, mock
 
 from time_machine import travel
@@ -10,11 +11,20 @@ from time_machine import travel
 from bootstrap.constants import DUMPS_DIR
 from bootstrap.helpers import (
     CollectorJSONEncoder,
+    count_tofu_plan_changes,
     dump_options,
+    empty_trash,
     format_gitlab_variable,
     format_tfvar,
+    get_git_mirror_dir,
+    get_requirements_hash,
+    get_tofu_fingerprint,
+    get_tofu_module_hash,
     load_options,
+    move_to_trash,
+    render_tofu_cli_config,
     slugify_option,
+    split_template_url,
     validate_or_prompt_domain,
     validate_or_prompt_path,
     validate_or_prompt_url,
@@ -29,27 +39,27 @@ class GitlabVariableTestcase(TestCase):
         """Test the formatting of a gitlab unmasked, unprotected variable."""
         self.assertEqual(
             format_gitlab_variable("value", False, False),
-            '{ value = "value", protected = false }',
+            {"value": "value", "protected": False},
         )
 
     def test_gitlab_variable_masked_unprotected(self):
         """Test the formatting of a gitlab masked, unprotected variable."""
         self.assertEqual(
             format_gitlab_variable("value", True, False),
-            '{ value = "value", masked = true, protected = false }',
+            {"value": "value", "masked": True, "protected": False},
         )
 
     def test_gitlab_variable_unmasked_protected(self):
         """Test the formatting of a gitlab unmasked, protected variable."""
         self.assertEqual(
-            format_gitlab_variable("value", False, True), '{ value = "value" }'
+            format_gitlab_variable("value", False, True), {"value": "value"}
         )
 
     def test_gitlab_variable_masked_protected(self):
         """Test the formatting of a gitlab masked, unprotected variable."""
         self.assertEqual(
             format_gitlab_variable("value", True, True),
-            '{ value = "value", masked = true }',
+            {"value": "value", "masked": True},
         )
 
 
@@ -73,6 +83,107 @@ class FormatTFVarTestCase(TestCase):
         self.assertEqual(format_tfvar("something else", "default"), '"something else"')
 
 
+class TofuModuleHashTestCase(TestCase):
+    """Test the 'get_tofu_module_hash' function."""
+
+    def test_module_hash(self):
+        """Test the hash changes with the module source, lock file and version."""
+        with TemporaryDirectory() as module_dir:
+            module_path = Path(module_dir)
+            (module_path / "main.tf").write_text('terraform { backend "local" {} }')
+            (module_path / "README.md").write_text("Not part of the module.")
+            module_hash = get_tofu_module_hash(module_path, "1.10.6")
+            self.assertEqual(get_tofu_module_hash(module_path, "1.10.6"), module_hash)
+            self.assertNotEqual(
+                get_tofu_module_hash(module_path, "1.10.7"), module_hash
+            )
+            (module_path / "README.md").write_text("Still not part of the module.")
+            self.assertEqual(get_tofu_module_hash(module_path, "1.10.6"), module_hash)
+            (module_path / ".terraform.lock.hcl").write_text("# lock")
+            locked_hash = get_tofu_module_hash(module_path, "1.10.6")
+            self.assertNotEqual(locked_hash, module_hash)
+            (module_path / "variables.tf").write_text('variable "name" {}')
+            self.assertNotEqual(
+                get_tofu_module_hash(module_path, "1.10.6"), locked_hash
+            )
+
+
+class TofuFingerprintTestCase(TestCase):
+    """Test the 'get_tofu_fingerprint' function."""
+
+    def test_fingerprint(self):
+        """Test the fingerprint changes with the module hash and variables only."""
+        fingerprint = get_tofu_fingerprint("hash", {"a": 1, "b": [2, 3]})
+        self.assertEqual(
+            get_tofu_fingerprint("hash", {"b": [2, 3], "a": 1}), fingerprint
+        )
+        self.assertNotEqual(
+            get_tofu_fingerprint("hash2", {"a": 1, "b": [2, 3]}), fingerprint
+        )
+        self.assertNotEqual(
+            get_tofu_fingerprint("hash", {"a": 1, "b": [3, 2]}), fingerprint
+        )
+
+
+class CountTofuPlanChangesTestCase(TestCase):
+    """Test the 'count_tofu_plan_changes' function."""
+
+    def test_count(self):
+        """Test the plan changes are counted by action."""
+        plan = {
+            "resource_changes": [
+                {"change": {"actions": actions}}
+                for actions in (
+                    ["create"],
+                    ["create"],
+                    ["update"],
+                    ["delete", "create"],
+                    ["create", "delete"],
+                    ["delete"],
+                    ["no-op"],
+                    ["read"],
+                )
+            ]
+        }
+        self.assertEqual(
+            count_tofu_plan_changes(plan),
+            {"create": 2, "update": 1, "replace": 2, "delete": 1},
+        )
+
+    def test_empty(self):
+        """Test a plan without changes."""
+        self.assertEqual(
+            count_tofu_plan_changes({}),
+            {"create": 0, "update": 0, "replace": 0, "delete": 0},
+        )
+
+
+class RenderTofuCliConfigTestCase(TestCase):
+    """Test the 'render_tofu_cli_config' function."""
+
+    def test_empty_mirror(self):
+        """Test no config is rendered without mirrored providers."""
+        with TemporaryDirectory() as mirror_dir:
+            self.assertIsNone(render_tofu_cli_config(Path(mirror_dir)))
+
+    def test_mirrored_providers(self):
+        """Test the mirrored providers are installed from the filesystem mirror."""
+        with TemporaryDirectory() as mirror_dir:
+            mirror_path = Path(mirror_dir)
+            (mirror_path / "registry.opentofu.org" / "hashicorp" / "vault").mkdir(
+                parents=True
+            )
+            (mirror_path / "registry.opentofu.org" / "hashicorp" / "tfe").mkdir()
+            cli_config = render_tofu_cli_config(mirror_path)
+        providers = (
+            '["registry.opentofu.org/hashicorp/tfe", '
+            '"registry.opentofu.org/hashicorp/vault"]'
+        )
+        self.assertIn(f'path    = "{mirror_path.resolve()}"', cli_config)
+        self.assertIn(f"include = {providers}", cli_config)
+        self.assertIn(f"exclude = {providers}", cli_config)
+
+
 class JSONEncoderTestCase(TestCase):
     """Test the custom JSON encoder class."""
 
@@ -99,26 +210,119 @@ class DumpOptionsTestCase(TestCase):
 
     def setUp(self) -> None:
         """Settting up variables for the test."""
-        self.dump_path = DUMPS_DIR / f"{time():.0f}.json"
+        self.dump_pattern = f"{time():.0f}-*.json"
         return super().setUp()
 
     def test_dump_options_no(self):
         """Test not dumping the options."""
         with mock_input("n"):
-            dump_options({"option": "1"})
-        self.assertFalse(os.path.exists(self.dump_path))
+            self.assertIsNone(dump_options({"option": "1"}))
+        self.assertEqual(list(DUMPS_DIR.glob(self.dump_pattern)), [])
 
     def test_dump_options_yes(self):
         """Test not dumping the options."""
         data_to_dump = {"option": "1"}
         with mock_input("y"):
-            dump_options(data_to_dump)
+            dump_path = dump_options(
+                {**data_to_dump, "plan_only": True, "vault_token": "token"}
+            )
         try:
-            self.assertTrue(os.path.exists(self.dump_path))
-            dumped_data = json.load(open(self.dump_path))
+            self.assertEqual(list(DUMPS_DIR.glob(self.dump_pattern)), [dump_path])
+            dumped_data = json.load(open(dump_path))
             self.assertEqual(dumped_data, data_to_dump)
         finally:
-            os.remove(self.dump_path)
+            os.remove(dump_path)
+
+
+class TemplateUrlTestCase(TestCase):
+    """Test the 'split_template_url' and 'get_git_mirror_dir' functions."""
+
+    def test_split_template_url(self):
+        """Test splitting a template URL with no pinned revision."""
+        self.assertEqual(
+            split_template_url("https://github.com/20tab/nextjs-continuous-delivery"),
+            ("https://github.com/20tab/nextjs-continuous-delivery", None),
+        )
+
+    def test_split_template_url_ref(self):
+        """Test splitting a template URL pinned to a revision."""
+        self.assertEqual(
+            split_template_url(
+                "https://github.com/20tab/nextjs-continuous-delivery#v1"
+            ),
+            ("https://github.com/20tab/nextjs-continuous-delivery", "v1"),
+        )
+
+    def test_get_git_mirror_dir(self):
+        """Test getting the mirror directories of different repositories."""
+        with mock.patch("bootstrap.helpers.GIT_MIRRORS_DIR", Path("/mirrors")):
+            backend_dir = get_git_mirror_dir(
+                "https://github.com/20tab/django-continuous-delivery"
+            )
+            fork_dir = get_git_mirror_dir(
+                "https://gitlab.com/20tab/django-continuous-delivery/"
+            )
+        self.assertEqual(backend_dir.parent, Path("/mirrors"))
+        self.assertRegex(backend_dir.name, r"^django-continuous-delivery-\w{16}\.git$")
+        self.assertNotEqual(backend_dir, fork_dir)
+
+
+class RequirementsHashTestCase(TestCase):
+    """Test the 'get_requirements_hash' function."""
+
+    def test_get_requirements_hash(self):
+        """Test hashing the same and different requirements."""
+        with TemporaryDirectory() as temp_dir:
+            requirements_path = Path(temp_dir) / "common.txt"
+            requirements_path.write_text("click==8.3.0\n")
+            requirements_hash = get_requirements_hash(requirements_path)
+            self.assertEqual(
+                get_requirements_hash(requirements_path), requirements_hash
+            )
+            requirements_path.write_text("click==8.3.1\n")
+            self.assertNotEqual(
+                get_requirements_hash(requirements_path), requirements_hash
+            )
+        self.assertEqual(len(requirements_hash), 16)
+
+
+class TrashTestCase(TestCase):
+    """Test the 'move_to_trash' and 'empty_trash' functions."""
+
+    def test_move_to_trash(self):
+        """Test moving a directory to the trash."""
+        with TemporaryDirectory() as temp_dir:
+            trash_dir = Path(temp_dir) / ".trash"
+            scratch_dir = Path(temp_dir) / "scratch"
+            (scratch_dir / "sub").mkdir(parents=True)
+            with mock.patch("bootstrap.helpers.TRASH_DIR", trash_dir):
+                move_to_trash(scratch_dir)
+                move_to_trash(Path(temp_dir) / "missing")
+            self.assertFalse(scratch_dir.exists())
+            (trashed_dir,) = trash_dir.iterdir()
+            self.assertTrue(trashed_dir.name.startswith("scratch-"))
+            self.assertTrue((trashed_dir / "sub").is_dir())
+
+    def test_empty_trash(self):
+        """Test deleting the trash content in a detached process."""
+        with TemporaryDirectory() as temp_dir:
+            trash_dir = Path(temp_dir) / ".trash"
+            (trash_dir / "scratch-1a2b3c4d" / "sub").mkdir(parents=True)
+            with mock.patch("bootstrap.helpers.TRASH_DIR", trash_dir):
+                empty_trash()
+            for _ in range(50):
+                if not any(trash_dir.iterdir()):
+                    break
+                sleep(0.1)
+            self.assertEqual(list(trash_dir.iterdir()), [])
+
+    def test_empty_trash_missing(self):
+        """Test emptying a missing trash."""
+        with TemporaryDirectory() as temp_dir, mock.patch(
+            "bootstrap.helpers.TRASH_DIR", Path(temp_dir) / ".trash"
+        ), mock.patch("subprocess.Popen") as popen:
+            empty_trash()
+        popen.assert_not_called()
 
 
 class LoadOptionsTestCase(TestCase):
@@ -0,0 +1,43 @@
+"""Bootstrap journal tests."""
+
+import os
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from bootstrap.journal import append_journal_entry, read_journal
+
+
+class JournalTestCase(TestCase):
+    """Test the journal functions."""
+
+    def test_append_and_read(self):
+        """Test the appended entries are read back in order."""
+        with TemporaryDirectory() as temp_dir:
+            journal_path = Path(temp_dir) / "journal.jsonl"
+            append_journal_entry(journal_path, event="step", step="service")
+            append_journal_entry(journal_path, event="module", env={"a": Path("b")})
+            self.assertEqual(os.stat(journal_path).st_mode & 0o777, 0o600)
+            self.assertEqual(
+                read_journal(journal_path),
+                [
+                    {"event": "step", "step": "service"},
+                    {"event": "module", "env": {"a": str(Path("b").resolve())}},
+                ],
+            )
+
+    def test_missing(self):
+        """Test a missing journal has no entries."""
+        with TemporaryDirectory() as temp_dir:
+            self.assertEqual(read_journal(Path(temp_dir) / "journal.jsonl"), [])
+
+    def test_truncated(self):
+        """Test a truncated last entry is ignored."""
+        with TemporaryDirectory() as temp_dir:
+            journal_path = Path(temp_dir) / "journal.jsonl"
+            append_journal_entry(journal_path, event="step", step="service")
+            with journal_path.open("a") as journal_file:
+                journal_file.write('{"event": "st')
+            self.assertEqual(
+                read_journal(journal_path), [{"event": "step", "step": "service"}]
+            )
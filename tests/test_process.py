@@ -0,0 +1,322 @@
+"""Bootstrap process tests."""
+
+import asyncio
+import gzip
+import os
+import sys
+import threading
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase, mock
+
+from bootstrap.constants import SUBREPO_WORKER_PATH
+from bootstrap.exceptions import BootstrapError
+from bootstrap.process import (
+    acall_process,
+    acapture_process,
+    arun_process,
+    arun_worker,
+    astart_worker,
+    astop_worker,
+    compressed_log,
+    process_usages,
+    sum_usage,
+)
+from bootstrap.tracing import Tracer
+
+
+class ArunProcessTestCase(TestCase):
+    """Test the 'arun_process' function."""
+
+    def test_output_streamed(self):
+        """Test the process output is written to the log files."""
+        with TemporaryDirectory() as logs_dir:
+            stdout_path = Path(logs_dir) / "stdout.log"
+            stderr_path = Path(logs_dir) / "stderr.log"
+            result = asyncio.run(
+                arun_process(
+                    [
+                        sys.executable,
+                        "-c",
+                        "import sys\n"
+                        "for i in range(100):\n"
+                        "    print(f'out {i}')\n"
+                        "    print(f'err {i}', file=sys.stderr)\n"
+                        "sys.exit(3)",
+                    ],
+                    stdout_path=stdout_path,
+                    stderr_path=stderr_path,
+                    tail_lines=2,
+                )
+            )
+            self.assertEqual(result.returncode, 3)
+            self.assertEqual(result.stderr_tail, ["err 98", "err 99"])
+            self.assertEqual(len(stdout_path.read_text().splitlines()), 100)
+            self.assertEqual(stderr_path.read_text().splitlines()[0], "err 0")
+
+    def test_timeout(self):
+        """Test the process is terminated when the timeout expires."""
+        with TemporaryDirectory() as logs_dir, self.assertRaises(BootstrapError):
+            asyncio.run(
+                arun_process(
+                    [sys.executable, "-c", "import time; time.sleep(60)"],
+                    stdout_path=Path(logs_dir) / "stdout.log",
+                    stderr_path=Path(logs_dir) / "stderr.log",
+                    timeout=0.5,
+                )
+            )
+
+    def test_cancelled(self):
+        """Test the process is terminated when the run is cancelled."""
+
+        async def cancel_process(pid_path, logs_dir):
+            process_task = asyncio.create_task(
+                arun_process(
+                    [
+                        sys.executable,
+                        "-c",
+                        f"import os, time; open({str(pid_path)!r}, 'w')"
+                        ".write(str(os.getpid())); time.sleep(60)",
+                    ],
+                    stdout_path=Path(logs_dir) / "stdout.log",
+                    stderr_path=Path(logs_dir) / "stderr.log",
+                )
+            )
+            while not pid_path.exists() or not pid_path.read_text():
+                await asyncio.sleep(0.05)
+            process_task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await process_task
+            return int(pid_path.read_text())
+
+        with TemporaryDirectory() as logs_dir:
+            pid = asyncio.run(cancel_process(Path(logs_dir) / "pid", logs_dir))
+        with self.assertRaises(ProcessLookupError):
+            os.kill(pid, 0)
+
+
+class CaptureProcessTestCase(TestCase):
+    """Test the 'acapture_process' function."""
+
+    def test_captured(self):
+        """Test the process output is returned."""
+        result = asyncio.run(
+            acapture_process(
+                [sys.executable, "-c", "import sys; print('out'); sys.exit(2)"]
+            )
+        )
+        self.assertEqual(result.returncode, 2)
+        self.assertEqual(result.stdout, "out\n")
+
+    def test_no_thread(self):
+        """Test the processes are reaped by the event loop, without threads."""
+
+        async def capture_processes():
+            return await asyncio.gather(
+                *(acapture_process(["sleep", "0.2"]) for _ in range(10)),
+                asyncio.to_thread(threading.active_count),
+            )
+
+        thread_count = threading.active_count()
+        *results, running_thread_count = asyncio.run(capture_processes())
+        self.assertEqual([result.returncode for result in results], [0] * 10)
+        # NOTE: the count itself runs in a thread
+        self.assertEqual(running_thread_count, thread_count + 1)
+
+
+class CallProcessTestCase(TestCase):
+    """Test the 'acall_process' function."""
+
+    def test_prefixed(self):
+        """Test the process output lines are echoed with the given prefix."""
+        with mock.patch("bootstrap.process.click.echo") as echo:
+            returncode = asyncio.run(
+                acall_process(
+                    [
+                        sys.executable,
+                        "-c",
+                        "import sys; print('out'); print('err', file=sys.stderr)",
+                    ],
+                    prefix="[frontend] ",
+                )
+            )
+        self.assertEqual(returncode, 0)
+        echo.assert_has_calls(
+            [
+                mock.call("[frontend] out", err=False),
+                mock.call("[frontend] err", err=True),
+            ],
+            any_order=True,
+        )
+
+    def test_group_interrupted(self):
+        """Test a process group is interrupted when the wait is cancelled."""
+
+        async def cancel_process(status_path):
+            process_task = asyncio.create_task(
+                acall_process(
+                    [
+                        sys.executable,
+                        "-c",
+                        "import time\n"
+                        f"status = open({str(status_path)!r}, 'w')\n"
+                        "print('started', file=status, flush=True)\n"
+                        "try:\n"
+                        "    time.sleep(60)\n"
+                        "except KeyboardInterrupt:\n"
+                        "    print('interrupted', file=status, flush=True)",
+                    ],
+                    group=True,
+                )
+            )
+            while not status_path.exists() or not status_path.read_text():
+                await asyncio.sleep(0.05)
+            process_task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await process_task
+
+        with TemporaryDirectory() as temp_dir:
+            status_path = Path(temp_dir) / "status"
+            asyncio.run(cancel_process(status_path))
+            self.assertEqual(status_path.read_text(), "started\ninterrupted\n")
+
+
+class WorkerTestCase(TestCase):
+    """Test the subrepo worker functions."""
+
+    def setUp(self):
+        """Create a subrepo with a fake runner."""
+        temp_dir = TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.subrepo_dir = Path(temp_dir.name)
+        (self.subrepo_dir / "bootstrap").mkdir()
+        (self.subrepo_dir / "bootstrap" / "__init__.py").touch()
+        (self.subrepo_dir / "bootstrap" / "runner.py").write_text(
+            "class Runner:\n"
+            "    def __init__(self, **options):\n"
+            "        self.options = options\n"
+            "    def run(self):\n"
+            "        if self.options.get('fail'):\n"
+            "            raise RuntimeError\n"
+            "        self.terraform_outputs = {'name': self.options['name']}\n"
+        )
+
+    async def run_worker(self, options=None):
+        """Start a worker, then run it with the given options or stop it."""
+        with mock.patch("bootstrap.process.click.echo"):
+            worker = await astart_worker(
+                [sys.executable, "-P", str(SUBREPO_WORKER_PATH)],
+                prefix="[subrepo] ",
+                cwd=self.subrepo_dir,
+            )
+            if options is None:
+                await astop_worker(worker)
+            else:
+                await arun_worker(worker, options)
+        return worker
+
+    def test_run(self):
+        """Test running a worker with the given options."""
+        worker = asyncio.run(self.run_worker({"name": "backend"}))
+        self.assertEqual(worker.process.returncode, 0)
+        ready, completed = worker.events
+        self.assertEqual(ready["event"], "ready")
+        self.assertEqual(completed["event"], "completed")
+        self.assertEqual(completed["outputs"], {"name": "backend"})
+
+    def test_failed(self):
+        """Test running a failing worker."""
+        worker = asyncio.run(self.run_worker({"fail": True}))
+        self.assertEqual(worker.process.returncode, 1)
+        self.assertEqual(
+            [event["event"] for event in worker.events], ["ready", "failed"]
+        )
+
+    def test_stopped(self):
+        """Test stopping an unused worker."""
+        worker = asyncio.run(self.run_worker())
+        self.assertEqual(worker.process.returncode, 0)
+        self.assertEqual([event["event"] for event in worker.events], ["ready"])
+
+
+class ProcessUsageTestCase(TestCase):
+    """Test the processes resource usage."""
+
+    async def call_processes(self, usages):
+        """Call a busy and an idle process in a span, collecting their usage."""
+        process_usages.set(usages)
+        with Tracer(track="main").span("tofu apply"):
+            await acall_process(
+                [
+                    sys.executable,
+                    "-c",
+                    "import time\n"
+                    "start = time.process_time()\n"
+                    "while time.process_time() - start < 0.2: pass",
+                ]
+            )
+            await acall_process(["true"])
+
+    def test_recorded(self):
+        """Test the usage of the waited processes is recorded with their phase."""
+        usages = []
+        asyncio.run(self.call_processes(usages))
+        self.assertEqual(
+            [(u["phase"], u["track"], u["command"]) for u in usages],
+            [
+                ("tofu apply", "main", Path(sys.executable).name),
+                ("tofu apply", "main", "true"),
+            ],
+        )
+        # NOTE: the child spins on its user and system CPU time, so only a total
+        self.assertGreater(usages[0]["user_seconds"] + usages[0]["system_seconds"], 0.1)
+        self.assertGreater(usages[0]["max_rss_kb"], 0)
+        summary = sum_usage(usages)
+        self.assertEqual(summary["processes"], 2)
+        self.assertEqual(
+            summary["user_seconds"],
+            round(usages[0]["user_seconds"] + usages[1]["user_seconds"], 3),
+        )
+        self.assertEqual(summary["max_rss_kb"], max(u["max_rss_kb"] for u in usages))
+
+    def test_not_collected(self):
+        """Test no usage is recorded unless it is collected."""
+        self.assertEqual(asyncio.run(acall_process(["true"])), 0)
+        self.assertIsNone(process_usages.get())
+
+
+class CompressedLogTestCase(TestCase):
+    """Test the 'compressed_log' context manager."""
+
+    def test_uncompressed(self):
+        """Test the log path itself is used without compression."""
+        log_path = Path("apply.log")
+        with compressed_log(log_path) as stream_path:
+            self.assertEqual(stream_path, log_path)
+
+    def test_gzip(self):
+        """Test the content written by a process is compressed."""
+        with TemporaryDirectory() as logs_dir:
+            log_path = Path(logs_dir) / "apply.log.gz"
+            with compressed_log(log_path, "gzip") as stream_path:
+                asyncio.run(
+                    arun_process(
+                        [
+                            sys.executable,
+                            "-c",
+                            f"open({str(stream_path)!r}, 'a').write('log line\\n' * 3)",
+                        ],
+                        stdout_path=Path(logs_dir) / "stdout.log",
+                        stderr_path=Path(logs_dir) / "stderr.log",
+                    )
+                )
+            self.assertFalse(stream_path.exists())
+            self.assertEqual(gzip.open(log_path).read(), b"log line\n" * 3)
+
+    def test_gzip_unused(self):
+        """Test an empty log is written when the process does not log."""
+        with TemporaryDirectory() as logs_dir:
+            log_path = Path(logs_dir) / "apply.log.gz"
+            with compressed_log(log_path, "gzip"):
+                pass
+            self.assertEqual(gzip.open(log_path).read(), b"")
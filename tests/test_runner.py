@@ -0,0 +1,335 @@
+"""Bootstrap runner tests."""
+
+import asyncio
+import json
+import os
+import subprocess
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import time
+from unittest import TestCase, mock
+
+from bootstrap.constants import GIT_MIRROR_MAX_AGE
+from bootstrap.exceptions import BootstrapError
+from bootstrap.helpers import get_git_mirror_dir
+from bootstrap.journal import append_journal_entry
+from bootstrap.runner import Runner
+from bootstrap.scheduler import Step
+
+
+def get_runner(**kwargs):
+    """Return a runner with the given options."""
+    return Runner(
+        output_dir=Path("."),
+        project_name="My Project",
+        project_slug="my_project",
+        project_dirname="myproject",
+        service_dir=Path("myproject"),
+        backend_type="none",
+        frontend_type="none",
+        terraform_backend="gitlab",
+        media_storage="local",
+        **kwargs,
+    )
+
+
+class RunnerPruneLogsTestCase(TestCase):
+    """Test the runner logs pruning."""
+
+    def setUp(self):
+        """Create some runs logs in a temporary directory."""
+        temp_dir = TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.runs_logs_dir = Path(temp_dir.name) / ".logs"
+        for mtime, name in enumerate(
+            ("1700000000", "1700000001-0123abcd", "1700000002-4567ef89", "src")
+        ):
+            (self.runs_logs_dir / name).mkdir(parents=True)
+            os.utime(self.runs_logs_dir / name, (mtime, mtime))
+        (self.runs_logs_dir / "1700000003.txt").touch()
+        logs_patch = mock.patch("bootstrap.runner.RUNS_LOGS_DIR", self.runs_logs_dir)
+        logs_patch.start()
+        self.addCleanup(logs_patch.stop)
+
+    def test_prune(self):
+        """Test only the oldest runs logs exceeding the retention are pruned."""
+        with mock.patch("bootstrap.runner.move_to_trash") as mocked_move_to_trash:
+            get_runner(logs_retention=2).prune_logs()
+        self.assertEqual(
+            [call.args[0].name for call in mocked_move_to_trash.call_args_list],
+            ["1700000000", "1700000001-0123abcd"],
+        )
+
+    def test_custom_logs_dir(self):
+        """Test the runs logs are not pruned when a custom logs dir is given."""
+        with mock.patch("bootstrap.runner.move_to_trash") as mocked_move_to_trash:
+            get_runner(
+                logs_dir=self.runs_logs_dir / "custom", logs_retention=2
+            ).prune_logs()
+        mocked_move_to_trash.assert_not_called()
+
+    def test_no_retention(self):
+        """Test the runs logs are not pruned without a retention."""
+        with mock.patch("bootstrap.runner.move_to_trash") as mocked_move_to_trash:
+            get_runner().prune_logs()
+        mocked_move_to_trash.assert_not_called()
+
+
+class RunnerGeneratedSecretTestCase(TestCase):
+    """Test the runner generated secrets."""
+
+    def setUp(self):
+        """Persist the generated secrets in a temporary directory."""
+        temp_dir = TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.states_dir = Path(temp_dir.name)
+        states_patch = mock.patch("bootstrap.runner.TOFU_STATES_DIR", self.states_dir)
+        states_patch.start()
+        self.addCleanup(states_patch.stop)
+
+    def test_reused(self):
+        """Test the generated secrets are reused by the following runs."""
+        runner = get_runner(subdomain_monitoring="logs")
+        runner.collect_gitlab_variables()
+        runner.collect_vault_environment_secrets("development")
+        other_runner = get_runner(subdomain_monitoring="logs")
+        other_runner.collect_gitlab_variables()
+        other_runner.collect_vault_environment_secrets("development")
+        self.assertEqual(other_runner.gitlab_variables, runner.gitlab_variables)
+        self.assertEqual(other_runner.vault_secrets, runner.vault_secrets)
+        secrets_path = self.states_dir / "my_project" / "platform" / "secrets.json"
+        self.assertEqual(os.stat(secrets_path).st_mode & 0o777, 0o600)
+        self.assertEqual(
+            sorted(json.loads(secrets_path.read_text())),
+            ["basic_auth", "envs/development/basic_auth", "grafana"],
+        )
+
+    def test_distinct(self):
+        """Test distinct secrets are generated for each name."""
+        runner = get_runner()
+        self.assertNotEqual(
+            runner.get_generated_secret("basic_auth"),
+            runner.get_generated_secret("grafana"),
+        )
+
+
+class RunnerRunTerraformTestCase(TestCase):
+    """Test the runner Terraform modules apply."""
+
+    def setUp(self):
+        """Keep the Terraform states and run files in a temporary directory."""
+        temp_dir = TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.temp_dir = Path(temp_dir.name)
+        states_patch = mock.patch(
+            "bootstrap.runner.TOFU_STATES_DIR", self.temp_dir / "states"
+        )
+        states_patch.start()
+        self.addCleanup(states_patch.stop)
+        self.commands = []
+
+    async def run_tofu(self, command, args, cwd, env, logs_dir, **kwargs):
+        """Record the Terraform command, and create or destroy the resources."""
+        self.commands.append(command)
+        state_path = Path(
+            next(arg for arg in args if arg.startswith("-state=")).split("=", 1)[1]
+        )
+        state_path.write_text(
+            json.dumps(
+                {"resources": command == "apply" and [{"mode": "managed"}] or []}
+            )
+        )
+        return 0
+
+    def get_runner(self, **kwargs):
+        """Return a runner with the Terraform commands mocked."""
+        runner = get_runner(
+            terraform_dir=self.temp_dir / "terraform",
+            logs_dir=self.temp_dir / "logs",
+            **kwargs,
+        )
+        runner.tofu_version = "1.9.0"
+        runner.run_tofu = self.run_tofu
+        runner.run_terraform_init = mock.AsyncMock()
+        return runner
+
+    def test_unchanged(self):
+        """Test the apply is skipped when the module is unchanged."""
+        asyncio.run(self.get_runner().run_terraform("gitlab", {"TF_VAR_a": "a"}))
+        asyncio.run(self.get_runner().run_terraform("gitlab", {"TF_VAR_a": "a"}))
+        asyncio.run(self.get_runner().run_terraform("gitlab", {"TF_VAR_a": "b"}))
+        self.assertEqual(self.commands, ["apply", "apply"])
+
+    def test_empty_state(self):
+        """Test the apply is not skipped when the state has no resources."""
+        asyncio.run(self.get_runner().run_terraform("gitlab", {"TF_VAR_a": "a"}))
+        state_path = self.temp_dir / "states" / "my_project" / "platform" / "gitlab"
+        (state_path / "terraform.tfstate").write_text('{"resources": []}')
+        asyncio.run(self.get_runner().run_terraform("gitlab", {"TF_VAR_a": "a"}))
+        self.assertEqual(self.commands, ["apply", "apply"])
+
+    def test_rollback(self):
+        """Test the module is applied again after its rollback."""
+        runner = self.get_runner()
+        runner.get_terraform_outputs = mock.AsyncMock(side_effect=BootstrapError)
+        with self.assertRaises(BootstrapError):
+            asyncio.run(
+                runner.run_terraform(
+                    "gitlab", {"TF_VAR_a": "a"}, outputs=["registry_password"]
+                )
+            )
+        asyncio.run(runner.reset_terraform())
+        asyncio.run(self.get_runner().run_terraform("gitlab", {"TF_VAR_a": "a"}))
+        self.assertEqual(self.commands, ["apply", "destroy", "apply"])
+
+    def test_journal(self):
+        """Test the tokens and the outputs are not journaled, but resumed."""
+        runner = self.get_runner(
+            gitlab_url="https://gitlab.example.com", gitlab_token="gitlab-token"
+        )
+        runner.get_terraform_outputs = mock.AsyncMock(
+            return_value={"registry_password": "registry-secret"}
+        )
+        asyncio.run(
+            runner.run_journaled_step(
+                Step(name="gitlab", func=runner.init_gitlab), "inputs"
+            )
+        )
+        journal = (self.temp_dir / "terraform" / "journal.jsonl").read_text()
+        self.assertNotIn("gitlab-token", journal)
+        self.assertNotIn("registry-secret", journal)
+        state_path = self.temp_dir / "states" / "my_project" / "platform" / "gitlab"
+        (state_path / "terraform.tfstate").write_text(
+            json.dumps({"outputs": {"registry_password": {"value": "registry-secret"}}})
+        )
+        resumed_runner = self.get_runner(
+            gitlab_url="https://gitlab.example.com", gitlab_token="gitlab-token"
+        )
+        resumed_runner.resume("inputs")
+        self.assertEqual(resumed_runner.completed_steps, {"gitlab"})
+        self.assertEqual(
+            resumed_runner.terraform_outputs,
+            {"gitlab": {"registry_password": "registry-secret"}},
+        )
+        self.assertEqual(
+            resumed_runner.terraform_run_modules,
+            [("gitlab", runner.get_module_env("gitlab"))],
+        )
+
+    def test_resume_missing_outputs(self):
+        """Test a step is run again when its outputs are missing from the state."""
+        (self.temp_dir / "terraform").mkdir()
+        append_journal_entry(
+            self.temp_dir / "terraform" / "journal.jsonl",
+            event="step",
+            step="gitlab",
+            inputs="inputs",
+            outputs=["registry_password"],
+        )
+        runner = self.get_runner()
+        runner.resume("inputs")
+        self.assertEqual(runner.completed_steps, set())
+
+
+class RunnerTofuVersionTestCase(TestCase):
+    """Test the runner OpenTofu version fetching."""
+
+    def test_fetched(self):
+        """Test the OpenTofu version is fetched from the installed OpenTofu."""
+        runner = get_runner()
+        with mock.patch(
+            "bootstrap.runner.acapture_process",
+            mock.AsyncMock(
+                return_value=mock.Mock(
+                    returncode=0, stdout='{"terraform_version": "1.9.0"}'
+                )
+            ),
+        ):
+            asyncio.run(runner.fetch_tofu_version())
+        self.assertEqual(runner.tofu_version, "1.9.0")
+
+    def test_failed(self):
+        """Test a failing or missing OpenTofu is a bootstrap error."""
+        for result in (
+            mock.AsyncMock(return_value=mock.Mock(returncode=1, stderr="error")),
+            mock.AsyncMock(side_effect=FileNotFoundError),
+        ):
+            with self.subTest(result=result), mock.patch(
+                "bootstrap.runner.acapture_process", result
+            ), mock.patch("bootstrap.runner.click.echo"), self.assertRaises(
+                BootstrapError
+            ):
+                asyncio.run(get_runner().fetch_tofu_version())
+
+
+class RunnerGitMirrorTestCase(TestCase):
+    """Test the runner templates git mirrors."""
+
+    def setUp(self):
+        """Create a template repository and its mirrors dir."""
+        temp_dir = TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.temp_dir = Path(temp_dir.name)
+        for patch in (
+            mock.patch("bootstrap.helpers.GIT_MIRRORS_DIR", self.temp_dir / "mirrors"),
+            mock.patch("bootstrap.runner.GIT_MIRRORS_DIR", self.temp_dir / "mirrors"),
+        ):
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.repo_dir = self.temp_dir / "template"
+        self.git("init", "-q", "-b", "main", str(self.repo_dir), cwd=self.temp_dir)
+        self.commit()
+        self.git("tag", "v1")
+
+    def git(self, *args, cwd=None):
+        """Run the given git command, return its output."""
+        return subprocess.run(
+            ["git", "-c", "user.name=t", "-c", "user.email=t@t", *args],
+            cwd=cwd or self.repo_dir,
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+
+    def commit(self):
+        """Add a commit to the template repository, return its SHA."""
+        self.git("commit", "-q", "--allow-empty", "-m", "commit")
+        return self.git("rev-parse", "HEAD")
+
+    def update_mirror(self, ref, age=0):
+        """Update the template mirror as if it was fetched the given seconds ago."""
+        mirror_dir = get_git_mirror_dir(str(self.repo_dir))
+        if mirror_dir.is_dir():
+            mtime = time() - age
+            os.utime(mirror_dir, (mtime, mtime))
+        asyncio.run(get_runner().update_git_mirror(str(self.repo_dir), ref))
+        return self.git("rev-parse", "main", cwd=mirror_dir)
+
+    def test_branch(self):
+        """Test a mirror pinned to a branch is fetched when too old."""
+        self.update_mirror("main")
+        head = self.commit()
+        self.assertNotEqual(self.update_mirror("main"), head)
+        self.assertEqual(self.update_mirror("main", GIT_MIRROR_MAX_AGE + 1), head)
+
+    def test_tag(self):
+        """Test a mirror pinned to a tag or a commit is not fetched when too old."""
+        first_head = self.update_mirror("v1")
+        self.commit()
+        self.assertEqual(self.update_mirror("v1", GIT_MIRROR_MAX_AGE + 1), first_head)
+        self.assertEqual(
+            self.update_mirror(first_head, GIT_MIRROR_MAX_AGE + 1), first_head
+        )
+
+    def test_missing_ref(self):
+        """Test a mirror missing the pinned revision is fetched."""
+        self.update_mirror("main")
+        self.git("checkout", "-q", "-b", "feature")
+        head = self.commit()
+        self.update_mirror("feature")
+        self.assertEqual(
+            self.git(
+                "rev-parse", "feature", cwd=get_git_mirror_dir(str(self.repo_dir))
+            ),
+            head,
+        )
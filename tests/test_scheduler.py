@@ -0,0 +1,179 @@
+"""Bootstrap scheduler tests."""
+
+import asyncio
+from functools import partial
+from threading import Event
+from unittest import TestCase
+
+from bootstrap.exceptions import BootstrapError
+from bootstrap.scheduler import Step, arun_steps, get_requirements
+
+
+class BlockingStepsTestCase(TestCase):
+    """Test the 'arun_steps' function with blocking steps."""
+
+    def test_requirements_order(self):
+        """Test steps are run after their requirements."""
+        calls = []
+        asyncio.run(
+            arun_steps(
+                [
+                    Step(name="c", func=lambda: calls.append("c"), requires=("a", "b")),
+                    Step(name="b", func=lambda: calls.append("b"), requires=("a",)),
+                    Step(name="a", func=lambda: calls.append("a")),
+                ],
+                max_workers=4,
+            )
+        )
+        self.assertEqual(calls, ["a", "b", "c"])
+
+    def test_independent_steps_overlap(self):
+        """Test independent steps are run at the same time."""
+        a_started, b_started = Event(), Event()
+
+        def a():
+            a_started.set()
+            self.assertTrue(b_started.wait(5))
+
+        def b():
+            b_started.set()
+            self.assertTrue(a_started.wait(5))
+
+        asyncio.run(
+            arun_steps([Step(name="a", func=a), Step(name="b", func=b)], max_workers=2)
+        )
+
+    def test_missing_requirements(self):
+        """Test requirements not matching any step are considered satisfied."""
+        calls = []
+        asyncio.run(
+            arun_steps(
+                [Step(name="a", func=lambda: calls.append("a"), requires=("missing",))],
+                max_workers=1,
+            )
+        )
+        self.assertEqual(calls, ["a"])
+
+    def test_failure(self):
+        """Test no dependent step is started after a failure."""
+        calls = []
+
+        def a():
+            raise BootstrapError
+
+        with self.assertRaises(BootstrapError):
+            asyncio.run(
+                arun_steps(
+                    [
+                        Step(name="a", func=a),
+                        Step(name="b", func=lambda: calls.append("b"), requires=("a",)),
+                    ],
+                    max_workers=2,
+                )
+            )
+        self.assertEqual(calls, [])
+
+    def test_unsatisfiable_requirements(self):
+        """Test circular requirements raise an error."""
+        with self.assertRaises(BootstrapError):
+            asyncio.run(
+                arun_steps(
+                    [
+                        Step(name="a", func=lambda: None, requires=("b",)),
+                        Step(name="b", func=lambda: None, requires=("a",)),
+                    ],
+                    max_workers=2,
+                )
+            )
+
+
+class ArunStepsTestCase(TestCase):
+    """Test the 'arun_steps' function."""
+
+    def test_coroutine_steps(self):
+        """Test coroutine steps are awaited after their requirements."""
+        calls = []
+
+        async def step(name):
+            await asyncio.sleep(0)
+            calls.append(name)
+
+        asyncio.run(
+            arun_steps(
+                [
+                    Step(name="b", func=partial(step, "b"), requires=("a",)),
+                    Step(name="a", func=partial(step, "a")),
+                ],
+                max_workers=2,
+            )
+        )
+        self.assertEqual(calls, ["a", "b"])
+
+    def test_cancelled(self):
+        """Test the running steps are cancelled along with the run."""
+        cancelled = []
+
+        async def a():
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                cancelled.append("a")
+                raise
+
+        async def cancel_steps():
+            steps_task = asyncio.create_task(
+                arun_steps([Step(name="a", func=a)], max_workers=1)
+            )
+            await asyncio.sleep(0.01)
+            steps_task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await steps_task
+
+        asyncio.run(cancel_steps())
+        self.assertEqual(cancelled, ["a"])
+
+    def test_failure_cancels_cancellable(self):
+        """Test a failure cancels the cancellable running steps only."""
+        calls = []
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise BootstrapError
+
+        async def sibling(name):
+            try:
+                await asyncio.sleep(0.1)
+            except asyncio.CancelledError:
+                calls.append(f"{name} cancelled")
+                raise
+            calls.append(f"{name} completed")
+
+        with self.assertRaises(BootstrapError):
+            asyncio.run(
+                arun_steps(
+                    [
+                        Step(name="a", func=fail, cancellable=True),
+                        Step(name="b", func=partial(sibling, "b"), cancellable=True),
+                        Step(name="c", func=partial(sibling, "c")),
+                    ],
+                    max_workers=3,
+                )
+            )
+        self.assertEqual(calls, ["b cancelled", "c completed"])
+
+
+class GetRequirementsTestCase(TestCase):
+    """Test the 'get_requirements' function."""
+
+    def test_indirect_requirements(self):
+        """Test the indirect requirements are collected."""
+        self.assertEqual(
+            get_requirements(
+                [
+                    Step(name="a", func=lambda: None),
+                    Step(name="b", func=lambda: None, requires=("a", "x")),
+                    Step(name="c", func=lambda: None, requires=("b",)),
+                ]
+            ),
+            {"a": set(), "b": {"a", "x"}, "c": {"a", "b", "x"}},
+        )
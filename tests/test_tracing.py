@@ -0,0 +1,103 @@
+"""Bootstrap tracing tests."""
+import asyncio
+import json
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from bootstrap.tracing import Tracer
+
+
+class TracerTestCase(TestCase):
+    """Test the 'Tracer' class."""
+
+    def test_span_nesting(self):
+        """Test spans are nested in the span they are started in."""
+        tracer = Tracer(track="main")
+
+        async def step(name):
+            with tracer.span(name, track=name), tracer.span("tofu apply") as span:
+                span["attributes"]["returncode"] = 0
+                await asyncio.sleep(0)
+
+        async def run():
+            with tracer.span("run"):
+                await asyncio.gather(step("gitlab"), step("vault"))
+
+        asyncio.run(run())
+        spans = {(span["name"], span["track"]): span for span in tracer.spans}
+        run_span = spans["run", "main"]
+        self.assertIsNone(run_span["parent_id"])
+        for name in ("gitlab", "vault"):
+            self.assertEqual(spans[name, name]["parent_id"], run_span["span_id"])
+            self.assertEqual(
+                spans["tofu apply", name]["parent_id"], spans[name, name]["span_id"]
+            )
+            self.assertEqual(spans["tofu apply", name]["attributes"], {"returncode": 0})
+
+    def test_span_error(self):
+        """Test a span records the error raised in it."""
+        tracer = Tracer(track="main")
+        with self.assertRaises(ValueError), tracer.span("cookiecutter"):
+            raise ValueError("boom")
+        self.assertEqual(tracer.spans[0]["error"], "ValueError('boom')")
+        self.assertGreaterEqual(tracer.spans[0]["duration"], 0)
+
+    def test_merge(self):
+        """Test merging the spans of a nested run under the current span."""
+        nested_tracer = Tracer(track="backend")
+        with nested_tracer.span("run"):
+            with nested_tracer.span("gitlab", track="gitlab"):
+                pass
+        tracer = Tracer(track="main")
+        with tracer.span("backend", track="backend") as parent:
+            tracer.merge(json.loads(json.dumps(nested_tracer.spans)))
+        spans = {span["name"]: span for span in tracer.spans}
+        self.assertEqual(spans["run"]["parent_id"], parent["span_id"])
+        self.assertEqual(spans["run"]["track"], "backend")
+        self.assertEqual(spans["gitlab"]["parent_id"], spans["run"]["span_id"])
+        self.assertEqual(spans["gitlab"]["track"], "backend/gitlab")
+
+    def test_write(self):
+        """Test writing the Chrome and OTLP traces."""
+        tracer = Tracer(track="main")
+        with tracer.span("run", run_id="1-a"):
+            with tracer.span("vault", track="vault"):
+                pass
+        with self.assertRaises(ValueError), tracer.span("cleanup"):
+            raise ValueError
+        with TemporaryDirectory() as temp_dir:
+            trace_path = Path(temp_dir) / "logs" / "trace.json"
+            otlp_trace_path = Path(temp_dir) / "logs" / "trace.otlp.json"
+            tracer.write(trace_path, otlp_trace_path)
+            chrome_trace = json.loads(trace_path.read_text())
+            otlp_trace = json.loads(otlp_trace_path.read_text())
+        events = chrome_trace["traceEvents"]
+        self.assertEqual(
+            [(e["ph"], e["tid"], e["args"]) for e in events if e["ph"] == "M"],
+            [("M", 1, {"name": "main"}), ("M", 2, {"name": "vault"})],
+        )
+        self.assertEqual(
+            [(e["name"], e["tid"]) for e in events if e["ph"] == "X"],
+            [("run", 1), ("vault", 2), ("cleanup", 1)],
+        )
+        self.assertEqual(events[2]["args"], {"run_id": "1-a"})
+        spans = otlp_trace["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        self.assertEqual({span["traceId"] for span in spans}, {tracer.trace_id})
+        vault_span, run_span, cleanup_span = spans
+        self.assertEqual(vault_span["parentSpanId"], run_span["spanId"])
+        self.assertNotIn("parentSpanId", run_span)
+        self.assertIn(
+            {"key": "run_id", "value": {"stringValue": "1-a"}},
+            run_span["attributes"],
+        )
+        self.assertEqual(cleanup_span["status"], {"code": 2, "message": "ValueError()"})
+        self.assertEqual(run_span["status"], {"code": 1})
+
+    def test_write_chrome_only(self):
+        """Test writing only the Chrome trace."""
+        tracer = Tracer(track="main")
+        with TemporaryDirectory() as temp_dir:
+            trace_path = Path(temp_dir) / "trace.json"
+            tracer.write(trace_path)
+            self.assertEqual([p.name for p in Path(temp_dir).iterdir()], ["trace.json"])